@@ -0,0 +1,317 @@
+"""Benchmarks for Spin the Wheel.
+
+Times frame rendering, winner resolution, wheel storage and cold startup,
+measures the memory held per loaded wheel and writes the results as JSON so
+runs can be compared over time:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+Tk rendering needs a display. On a headless machine run it under Xvfb
+(xvfb-run python benchmark.py), otherwise frames are timed with the
+off-screen Pillow renderer instead.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from wheelengine import WheelEngine
+from wheelmodel import WHEEL_COLORS, Wheel
+from wheelstore import JsonDirectoryStore, SQLiteStore
+
+SECTOR_COUNTS = [10, 100, 1000, 10000]
+ITEM_COUNTS = [10, 100, 1000, 10000, 100000]
+WHEEL_COUNTS = [10, 100, 1000, 10000, 100000]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_items(n):
+    return [(f"Item {i}", 1 + i % 5) for i in range(n)]
+
+
+def measure(fn, repeat=5, number=1):
+    """Run fn number times per sample and return per-call timing stats in seconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def result(group, name, params, stats):
+    return dict({"group": group, "name": name, "params": params}, **stats)
+
+
+def bench_tk_render(sector_counts, frames):
+    """Time draw_wheel() in each canvas render mode, or None without a display"""
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    import spinwheel
+
+    results = []
+    for mode, label_images in (("immediate", True), ("retained", True),
+                               ("immediate", False), ("retained", False)):
+        # Pre-rotated image labels are the default, Tk text labels are kept for comparison
+        name = f"tk_{mode}_frame" if label_images else f"tk_{mode}_frame_text_labels"
+        for n in sector_counts:
+            window = spinwheel.SpinTheWheel(f"bench-{n}", make_items(n), render_mode=mode,
+                                            label_images=label_images)
+
+            def frame():
+                window.rotation = (window.rotation + 7.3) % 360
+                window.draw_wheel()
+                window.root.update_idletasks()
+
+            stats = measure(frame, repeat=3, number=frames)
+            stats["canvas_items"] = len(window.canvas.find_all())
+            results.append(result("render", name, {"sectors": n}, stats))
+            window.on_close()
+    root.destroy()
+    return results
+
+
+def bench_pillow_render(sector_counts, frames):
+    """Time rasterizing and rotating frames with the Pillow renderer"""
+    try:
+        from wheelrender import FrameCache, PillowWheelRenderer, label_image
+    except ImportError:
+        return []
+
+    results = []
+    for n in sector_counts:
+        items = make_items(n)
+        renderer = PillowWheelRenderer(items, WHEEL_COLORS, cache=FrameCache())
+        results.append(result("render", "pillow_rasterize", {"sectors": n},
+                              measure(renderer.rasterize, repeat=1)))
+        renderer.base_image()
+        angles = iter(range(10 ** 9))
+        results.append(result("render", "pillow_frame_uncached", {"sectors": n},
+                              measure(lambda: renderer.render_frame(next(angles) % 360),
+                                      repeat=3, number=frames)))
+        renderer.frame(0)
+        results.append(result("render", "pillow_frame_cached", {"sectors": n},
+                              measure(lambda: renderer.frame(0), repeat=3, number=frames)))
+    # What one label costs the first time it is shown at an angle, before LABEL_CACHE has it
+    results.append(result("render", "pillow_label_render", {},
+                          measure(lambda: label_image("Item 1234", 13, "white", next(angles) % 360),
+                                  repeat=3, number=100)))
+    return results
+
+
+def bench_winner(item_counts):
+    """Time building an engine and resolving winners"""
+    results = []
+    for n in item_counts:
+        items = make_items(n)
+        results.append(result("winner", "engine_build", {"items": n},
+                              measure(lambda: WheelEngine(items), repeat=3)))
+        engine = WheelEngine(items, seed=1)
+        angles = [random.uniform(0, 360) for _ in range(1000)]
+        results.append(result("winner", "item_at_angle", {"items": n},
+                              measure(lambda: [engine.item_at_angle(a) for a in angles], repeat=5)))
+        results.append(result("winner", "draw", {"items": n},
+                              measure(lambda: [engine.draw() for _ in range(1000)], repeat=5)))
+        results.append(result("winner", "counts_1m", {"items": n},
+                              measure(lambda: engine.counts(1000000), repeat=3)))
+    return results
+
+
+def allocated(fn):
+    """Call fn and return (result, bytes still allocated for the result)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = fn()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def memory_result(name, params, nbytes):
+    return result("memory", name, params, {
+        "min": nbytes, "median": nbytes, "max": nbytes, "repeat": 1, "number": 1,
+        "unit": "bytes", "per_item": nbytes / params["items"]})
+
+
+def bench_memory(item_counts):
+    """Measure the memory held by a loaded wheel as a JSON list and as a Wheel"""
+    results = []
+    WheelEngine(make_items(2))  # Keep the lazy NumPy import out of the measurements
+    for n in item_counts:
+        text = json.dumps(make_items(n))
+        params = {"items": n}
+
+        items, nbytes = allocated(lambda: json.loads(text))
+        results.append(memory_result("json_list", params, nbytes))
+        del items
+
+        wheel, nbytes = allocated(lambda: Wheel(json.loads(text)))
+        results.append(memory_result("wheel", params, nbytes))
+
+        # What each additional open window adds on top of the shared Wheel
+        engine, nbytes = allocated(lambda: WheelEngine(wheel))
+        results.append(memory_result("window_engine", params, nbytes))
+        del engine, wheel
+    return results
+
+
+def bench_storage(wheel_counts):
+    """Time save/load/list for each backend at growing library sizes"""
+    results = []
+    items = make_items(20)
+    for backend in ("json", "sqlite"):
+        for n in wheel_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                if backend == "json":
+                    store = JsonDirectoryStore(os.path.join(tmp, "wheels"))
+                else:
+                    store = SQLiteStore(os.path.join(tmp, "wheels.db"))
+                params = {"backend": backend, "wheels": n}
+                names = [f"wheel-{i:06d}" for i in range(n)]
+
+                stats = measure(lambda: store.save_many((name, items) for name in names), repeat=1)
+                stats["per_wheel"] = stats["median"] / n
+                results.append(result("storage", "save_all", params, stats))
+
+                picks = [random.choice(names) for _ in range(100)]
+                results.append(result("storage", "save_one", params,
+                                      measure(lambda: store.save_wheel(names[0], items), repeat=5)))
+                results.append(result("storage", "load_100", params,
+                                      measure(lambda: [store.load_wheel(name) for name in picks], repeat=3)))
+                results.append(result("storage", "list_all", params,
+                                      measure(store.list_wheels, repeat=3)))
+                results.append(result("storage", "list_page", params,
+                                      measure(lambda: store.list_wheels("wheel-0", 0, 50), repeat=3)))
+                store.close()
+    return results
+
+
+def bench_startup(repeat):
+    """Time cold imports and, with a display, the manager window in fresh interpreters"""
+    results = []
+    for name, code in (("import_spinwheel", "import spinwheel"),
+                       ("import_wheelstore", "import wheelstore")):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True,
+                           stdout=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+        results.append(result("startup", name, {}, {
+            "min": min(samples), "median": statistics.median(samples),
+            "max": max(samples), "repeat": repeat, "number": 1}))
+
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "spinwheel.py", "--startup-time"], cwd=HERE,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            break
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1])["startup_s"])
+    if samples:
+        results.append(result("startup", "manager_window", {}, {
+            "min": min(samples), "median": statistics.median(samples),
+            "max": max(samples), "repeat": len(samples), "number": 1}))
+    return results
+
+
+def result_key(r):
+    return (r["group"], r["name"], json.dumps(r["params"], sort_keys=True))
+
+
+def compare(old_path, results):
+    """Print the median change of each benchmark against an older run"""
+    with open(old_path) as f:
+        old = {result_key(r): r for r in json.load(f)["results"]}
+    for r in results:
+        before = old.get(result_key(r))
+        if before is None or not before["median"]:
+            continue
+        change = (r["median"] - before["median"]) / before["median"] * 100
+        if r.get("unit") == "bytes":
+            values = f"{before['median'] / 1024:10.1f}KB -> {r['median'] / 1024:10.1f}KB"
+        else:
+            values = f"{before['median'] * 1000:10.3f}ms -> {r['median'] * 1000:10.3f}ms"
+        print(f"{r['group']:8} {r['name']:24} {json.dumps(r['params']):40} {values}  {change:+6.1f}%",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", choices=["render", "winner", "memory", "storage", "startup"],
+                        action="append",
+                        help="Run only these groups (repeatable)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Skip the largest sizes for a fast sanity run")
+    parser.add_argument("--frames", type=int, default=30, help="Frames per render sample")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+    groups = args.only or ["render", "winner", "memory", "storage", "startup"]
+
+    sector_counts = SECTOR_COUNTS[:3] if args.quick else SECTOR_COUNTS
+    item_counts = ITEM_COUNTS[:3] if args.quick else ITEM_COUNTS
+    wheel_counts = WHEEL_COUNTS[:3] if args.quick else WHEEL_COUNTS
+
+    results = []
+    # Keep stray prints from the app out of the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if "render" in groups:
+            tk_results = bench_tk_render(sector_counts, args.frames)
+            if tk_results is None:
+                print("No display, timing frames with the Pillow renderer only")
+                tk_results = []
+            results += tk_results + bench_pillow_render(sector_counts, args.frames)
+        if "winner" in groups:
+            results += bench_winner(item_counts)
+        if "memory" in groups:
+            results += bench_memory(item_counts)
+        if "storage" in groups:
+            results += bench_storage(wheel_counts)
+        if "startup" in groups:
+            results += bench_startup(repeat=3 if args.quick else 10)
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
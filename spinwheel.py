@@ -1,34 +1,434 @@
+import time
+STARTUP_BEGIN = time.perf_counter()  # Taken first so --startup-time covers every import
+
+import sys
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Headless subcommands (see wheelcli.py) run without importing Tk
+    from wheelcli import COMMANDS, main
+    if sys.argv[1] in COMMANDS:
+        sys.exit(main())
+
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import random
 import math
-import time
+import numbers
 import os
 import json
 import threading
-from PIL import Image, ImageTk, ImageDraw
-import pygame
-import sys
+import queue
+import sqlite3
+import weakref
+from collections import deque
+from wheelhistory import (HISTORY, SOURCE_ELIMINATION, SOURCE_NAMES, SOURCE_OUTCOME, SOURCE_SERVICE,
+                          SOURCE_SPIN)
+from wheelengine import (LANDING_MODES, SPIN_SECONDS, EliminationDraw, SpinOutcome, WheelEngine,
+                         ease_out_quad, spin_rotations)
+from wheelio import LineError, export_wheel, import_wheel, parse_text_line, read_plan, write_plan
+from wheelmetrics import METRICS
+from wheelmodel import WHEEL_COLORS, as_wheel
+from wheelstore import WHEEL_CACHE, WHEEL_DIR, WHEEL_WRITER, get_store, same_items
 
-WHEEL_DIR = "wheels"
 SOUND_DIR = "sounds"
 
+WHEEL_RADIUS = 200
+WHEEL_CENTER = (250, 250)
+ELIMINATED_COLOR = "#bdc3c7"
+ELIMINATED_LABEL_COLOR = "#7f8c8d"
+
+# Level of detail for wheels with many items
+LOD_MIN_SECTOR_EXTENT = 1.0  # degrees, thinner neighbouring items share one arc
+LOD_HIDE_LABEL_SPEED = 12.0  # degrees per frame above which labels are hidden
+LABEL_WARMUP_SECONDS = 0.008  # Per frame, spent rendering label images while labels are hidden
+LABEL_FONT_MIN = 6
+LABEL_FONT_MAX = 10
+LABEL_POINTS_PER_DEGREE = 2.0
+
+# Live size updates are saved at most this often
+WEIGHT_SAVE_MS = 1000
+
+DIAGNOSTICS_MS = 2000  # Refresh interval of the diagnostics window
+
+class FramePacer:
+    """Paces animation frames at a target FPS and counts dropped frames"""
+    def __init__(self, fps=30, keep_times=True):
+        self.fps = fps
+        self.interval = 1 / fps
+        self.start_time = None
+        self.frame_index = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.hidden = 0
+        self.keep_times = keep_times
+        self.render_times = []
+
+    def start(self, now):
+        """Start pacing from the given perf_counter() time"""
+        self.start_time = now
+        self.frame_index = 0
+
+    def frame_done(self, frame_start, now):
+        """Record a rendered frame and return the delay in ms before the next one"""
+        self.rendered += 1
+        if self.keep_times:
+            self.render_times.append(now - frame_start)
+
+        # Skip to the next frame slot that is still in the future
+        next_index = int((now - self.start_time) / self.interval) + 1
+        self.dropped += max(0, next_index - self.frame_index - 1)
+        self.frame_index = next_index
+
+        next_time = self.start_time + next_index * self.interval
+        return max(1, round((next_time - now) * 1000))
+
+    def due(self, now):
+        """Return whether the next frame slot has started"""
+        return now >= self.start_time + self.frame_index * self.interval
+
+    def frame_hidden(self, now):
+        """Skip a frame that wasn't drawn because the window is hidden"""
+        self.hidden += 1
+        self.frame_index = int((now - self.start_time) / self.interval) + 1
+
+    def stats(self):
+        """Return the frame counts and render times recorded so far"""
+        times_ms = [t * 1000 for t in self.render_times]
+        return {
+            "fps": self.fps,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "hidden": self.hidden,
+            "mean_render_ms": sum(times_ms) / len(times_ms) if times_ms else 0.0,
+            "max_render_ms": max(times_ms, default=0.0),
+            "render_times_ms": times_ms,
+        }
+
+
+class AnimationClock:
+    """Drives the animations of every wheel window from one after() chain.
+
+    Each tick advances all active animations, then draws each window that
+    asked for a redraw once, so Tk repaints everything in a single idle
+    pass. Minimized or hidden windows keep animating but aren't drawn
+    until they are shown again.
+    """
+    def __init__(self, root, fps=30):
+        self.root = root
+        self.fps = fps
+        self.animations = {}  # window -> step(now), which returns False when finished
+        self.dirty = {}  # Windows to redraw on the next tick, in request order
+        self.pacer = None
+        self.after_id = None
+        self.ticking = False
+
+    def add(self, window, step, fps=None):
+        """Call step(now) every frame until it returns False or window is removed"""
+        fps = max(fps or self.fps, self.fps)
+        self.animations[window] = step
+        if self.pacer is None or fps > self.pacer.fps:
+            self.pacer = FramePacer(fps, keep_times=False)
+            self.pacer.start(time.perf_counter())
+        self.schedule(1)
+
+    def remove(self, window):
+        """Stop animating window and forget its pending redraw"""
+        self.animations.pop(window, None)
+        self.dirty.pop(window, None)
+        if not self.animations and not self.dirty:
+            self.cancel()
+
+    def request_redraw(self, window):
+        """Redraw window on the next tick, however often this is called before it"""
+        self.dirty[window] = None
+        self.schedule(1)
+
+    def schedule(self, delay):
+        # Requests made during a tick are picked up when it reschedules
+        if self.after_id is None and not self.ticking:
+            self.after_id = self.root.after(delay, self.tick)
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if not self.animations:
+            self.pacer = None
+
+    def tick(self):
+        self.after_id = None
+        self.ticking = True
+        frame_start = time.perf_counter()
+        try:
+            for window, step in list(self.animations.items()):
+                try:
+                    running = step(frame_start)
+                except tk.TclError:
+                    running = False  # The window was destroyed
+                except Exception as e:
+                    # One broken animation must not stop the clock for every window
+                    print(f"Animation failed: {e!r}")
+                    running = False
+                if not running:
+                    self.animations.pop(window, None)
+
+            dirty, self.dirty = self.dirty, {}
+            for window in dirty:
+                try:
+                    if window.is_visible():
+                        window.redraw()
+                    else:
+                        window.stale = True  # Drawn when it is shown again
+                except tk.TclError:
+                    pass
+                except Exception as e:
+                    print(f"Redraw failed: {e!r}")
+        finally:
+            self.ticking = False
+        METRICS.set_gauge("spinwheel_animating_windows", len(self.animations))
+
+        if self.animations:
+            self.schedule(self.pacer.frame_done(frame_start, time.perf_counter()))
+        elif self.dirty:
+            self.schedule(1)
+        else:
+            self.pacer = None
+
+
+class AfterCallbacks:
+    """The pending after() callbacks of one window, so closing it can cancel them all"""
+    def __init__(self, widget):
+        self.widget = widget
+        self.pending = set()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def after(self, delay, callback, *args):
+        """Schedule callback like widget.after() and return its id for cancel()"""
+        def run():
+            self.pending.discard(after_id)
+            callback(*args)
+
+        after_id = self.widget.after(delay, run)
+        self.pending.add(after_id)
+        return after_id
+
+    def cancel(self, after_id):
+        if after_id in self.pending:
+            self.pending.discard(after_id)
+            self.widget.after_cancel(after_id)
+
+    def cancel_all(self):
+        for after_id in self.pending:
+            self.widget.after_cancel(after_id)
+        self.pending.clear()
+
+
+class SoundService:
+    """Sound effects shared by every wheel window.
+
+    pygame is imported and the mixer initialized on a background thread the
+    first time a window needs sound, and each WAV file is decoded only once.
+    """
+    def __init__(self, sound_dir=SOUND_DIR, names=("spin", "win")):
+        self.sound_dir = sound_dir
+        self.names = names
+        self.sounds = {}
+        self.loader = None
+        self.ready = threading.Event()
+        self.init_time = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start loading sounds in the background unless already started"""
+        with self.lock:
+            if self.loader is None:
+                self.loader = threading.Thread(target=self.load, name="sound-loader", daemon=True)
+                self.loader.start()
+
+    def load(self):
+        """Initialize the mixer and decode every sound file"""
+        started = time.perf_counter()
+        sounds = {}
+        try:
+            import pygame
+
+            pygame.mixer.init()
+            for name in self.names:
+                path = os.path.join(self.sound_dir, f"{name}.wav")
+                if os.path.exists(path):
+                    sounds[name] = pygame.mixer.Sound(path)
+        except Exception as e:
+            print(f"Sound disabled: {e}")
+        self.sounds = sounds
+        self.init_time = time.perf_counter() - started
+        METRICS.set_gauge("spinwheel_sound_init_seconds", self.init_time)
+        self.ready.set()
+
+    def play(self, name):
+        """Play a sound if it has been loaded, never waiting for the mixer"""
+        self.start()
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
+
+    def unload(self):
+        """Free the decoded sounds and close the mixer; start() loads them again"""
+        with self.lock:
+            loader, self.loader = self.loader, None
+        if loader is None:
+            return
+        loader.join()  # Long finished unless a window was closed right after opening
+        self.sounds = {}
+        self.ready.clear()
+        pygame = sys.modules.get("pygame")
+        if pygame is not None:
+            try:
+                pygame.mixer.quit()
+            except Exception as e:
+                print(f"Could not close the mixer: {e}")
+
+
+SOUNDS = SoundService()
+
+
+class SharedResource:
+    """Counts the windows using a process-wide resource and frees it when the last one closes"""
+    def __init__(self, name, release):
+        self.name = name
+        self.release_callback = release
+        self.users = 0
+
+    def acquire(self):
+        self.users += 1
+
+    def release(self):
+        self.users -= 1
+        if self.users == 0:
+            self.release_callback()
+
+
+def release_images():
+    """Empty the Pillow frame and label caches once no window shows their images"""
+    renderer = sys.modules.get("wheelrender")
+    if renderer is not None:
+        renderer.FRAME_CACHE.clear()
+        renderer.LABEL_CACHE.clear()
+        renderer.text_image.cache_clear()
+
+
+SOUND_USERS = SharedResource("sounds", SOUNDS.unload)
+IMAGE_USERS = SharedResource("images", release_images)
+SHARED_RESOURCES = (SOUND_USERS, IMAGE_USERS)
+
+LABEL_RENDERER = None  # wheelrender, once a window draws its labels as images
+
+
+def load_label_renderer():
+    """Import the Pillow label renderer on first use, or return None without Pillow"""
+    global LABEL_RENDERER
+    if LABEL_RENDERER is None:
+        try:
+            import wheelrender
+            LABEL_RENDERER = wheelrender
+        except ImportError:
+            return None
+    return LABEL_RENDERER
+
+
 class SpinTheWheel:
-    def __init__(self, wheel_name, items_with_sizes, parent_manager=None):
+    instances = weakref.WeakSet()  # Every window not yet garbage collected, closed or not
+
+    def __init__(self, wheel_name, items_with_sizes, parent_manager=None, render_mode="retained",
+                 frame_step=1.0, fps=30, level_of_detail=True, landing="continuous",
+                 elimination=False, outcome_first=True, label_images=True):
         self.wheel_name = wheel_name
-        self.items_with_sizes = items_with_sizes
-        self.total = sum(size for _, size in items_with_sizes)
-        self.angle_per_unit = 360 / self.total
+        self.closed = False
+        SpinTheWheel.instances.add(self)
+        # A Wheel shared with the cache and other windows of the same wheel
+        self.items_with_sizes = as_wheel(items_with_sizes)
+        self.total = self.items_with_sizes.total
+        self.angle_per_unit = self.items_with_sizes.angle_per_unit
+        self.engine = WheelEngine(self.items_with_sizes)
         self.rotation = 0
         self.is_spinning = False
         self.parent_manager = parent_manager
+        self.fps = fps
+        if landing not in LANDING_MODES:
+            raise ValueError(f"Unknown landing mode '{landing}'.")
+        self.landing = landing
+        self.rng = random.Random()
+        self.spin_stats = []  # Frame pacing stats of each finished spin
+        self.pacer = None  # Frame pacing of the running spin
+        self.stale = False  # Skipped a redraw while hidden
+
+        # Outcome-first spins draw the winner from a per-spin seed, then animate
+        # to a point inside its sector; otherwise the winner is read off wherever
+        # a free spin stops. Planned outcomes are used up before new ones are drawn
+        self.outcome_first = outcome_first
+        self.planned = deque()
+        self.last_outcome = None
+
+        # Live size updates are collected here and applied once per frame
+        self.pending_weights = {}
+        self.private_wheel = False  # Changing a copy of the shared Wheel
+        self.label_index = None
+        self.weight_save_id = None
+        self.saved_wheel = None  # Last copy handed to the wheel writer
+
+        # "retained" creates canvas items once and moves them each frame,
+        # "immediate" deletes and recreates everything on every frame and
+        # "pillow" shows cached rotations of a pre-rendered wheel bitmap
+        self.render_mode = render_mode
+        self.frame_step = frame_step
+        self.renderer = None
+        self.wheel_built = False
+        self.sector_arcs = []
+        self.sector_labels = []
+        self.pointer_label = None
+        self.wheel_image = None
+        self.wheel_photo = None
+
+        # Level of detail merges thin sectors, scales and culls labels and
+        # hides labels while the wheel spins fast
+        self.level_of_detail = level_of_detail
+        self.labels_visible = True
+
+        # Labels drawn as pre-rotated Pillow images from a cache shared by
+        # every window, instead of Tk laying out rotated text each frame
+        self.label_images = label_images and load_label_renderer() is not None
+        self.label_styles = {}  # Canvas item -> [text, pixel size, color, angle]
+        self.label_photos = {}  # Canvas item -> the PhotoImage it shows
+        self.label_jobs = deque()  # Label images the running spin will need
+
+        # Elimination mode removes each winner from the following draws
+        self.eliminator = None
+        self.eliminated = set()
+        self.draw_rank = 0
+        self.layout_sectors()
 
         # Make independent window
         self.root = tk.Toplevel()
         self.root.title(f"Spin the Wheel - {wheel_name}")
+        self.root.bind("<Map>", self.on_map)
         self.root.geometry("600x700")
         self.root.resizable(False, False)
         self.root.configure(bg="#f0f0f0")
+        self.pixels_per_point = float(self.root.tk.call("tk", "scaling"))
+        self.callbacks = AfterCallbacks(self.root)  # Cancelled when the window closes
+
+        # Menu for planned and replayed spins
+        menu_bar = tk.Menu(self.root)
+        spins_menu = tk.Menu(menu_bar, tearoff=False)
+        spins_menu.add_command(label="Precompute Spins...", command=self.precompute_spins)
+        spins_menu.add_command(label="Load Plan...", command=self.load_plan)
+        spins_menu.add_command(label="Save Plan...", command=self.save_plan)
+        spins_menu.add_command(label="Clear Plan", command=self.clear_plan)
+        spins_menu.add_separator()
+        spins_menu.add_command(label="Replay Seed...", command=self.replay_seed)
+        spins_menu.add_command(label="Export Animation...", command=self.export_animation)
+        menu_bar.add_cascade(label="Spins", menu=spins_menu)
+        self.root.config(menu=menu_bar)
 
         # Center the window
         self.root.update_idletasks()
@@ -73,13 +473,25 @@ class SpinTheWheel:
                                        width=10, height=2, relief="flat", cursor="hand2")
             self.edit_button.pack(side=tk.LEFT, padx=5)
 
-        self.close_button = tk.Button(button_frame, text="CLOSE", command=self.root.destroy,
+        self.close_button = tk.Button(button_frame, text="CLOSE", command=self.on_close,
                                      font=("Arial", 14), bg="#95a5a6", fg="white",
                                      width=10, height=2, relief="flat", cursor="hand2")
         self.close_button.pack(side=tk.LEFT, padx=5)
+        if self.parent_manager:
+            self.parent_manager.windows.add(self)
+            METRICS.set_gauge("spinwheel_open_windows", len(self.parent_manager.windows))
 
-        # Initialize sound
+        # Windows of one manager share its clock, so spins run in one callback
+        self.clock = self.parent_manager.clock if self.parent_manager else AnimationClock(self.root)
+
+        self.elimination_var = tk.BooleanVar(value=elimination)
+        tk.Checkbutton(button_frame, text="Remove winners", variable=self.elimination_var,
+                       command=self.reset_elimination, font=("Arial", 11),
+                       bg="#f0f0f0").pack(side=tk.LEFT, padx=5)
+
+        # Initialize sound, and hold the shared label and frame images until closed
         self.init_sound()
+        IMAGE_USERS.acquire()
 
         # Draw the wheel
         self.draw_wheel()
@@ -87,18 +499,17 @@ class SpinTheWheel:
         # Handle window closing
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # Follow changes made to this wheel elsewhere
+        self.pending_items = None
+        WHEEL_CACHE.subscribe(self.wheel_name, self.on_wheel_changed)
+
         # Center the window on screen
         self.center_window()
 
     def init_sound(self):
         """Initialize sound system"""
-        try:
-            pygame.mixer.init()
-            self.spin_sound = pygame.mixer.Sound(os.path.join(SOUND_DIR, "spin.wav")) if os.path.exists(SOUND_DIR) else None
-            self.win_sound = pygame.mixer.Sound(os.path.join(SOUND_DIR, "win.wav")) if os.path.exists(SOUND_DIR) else None
-        except:
-            self.spin_sound = None
-            self.win_sound = None
+        SOUND_USERS.acquire()
+        SOUNDS.start()
 
     def center_window(self):
         """Center the window on screen"""
@@ -109,11 +520,105 @@ class SpinTheWheel:
 
     def draw_wheel(self):
         """Draw the wheel with items"""
+        if self.render_mode == "immediate" or not self.wheel_built:
+            self.build_wheel()
+        elif self.render_mode == "pillow":
+            self.update_wheel_image()
+        else:
+            self.update_wheel()
+
+    def redraw(self):
+        """Draw the current frame, called by the animation clock"""
+        frame_start = time.perf_counter()
+        if self.pending_weights and not self.is_spinning:
+            self.apply_weights()
+        self.draw_wheel()
+        self.stale = False
+        now = time.perf_counter()
+        if self.pacer is not None:
+            self.pacer.frame_done(frame_start, now)
+        if METRICS.enabled:
+            METRICS.observe("spinwheel_frame_render_seconds", now - frame_start, mode=self.render_mode)
+
+    def is_visible(self):
+        """Return whether the window is mapped, i.e. not minimized or withdrawn"""
+        return bool(self.root.winfo_viewable())
+
+    def on_map(self, event):
+        if event.widget is self.root and self.stale:
+            self.clock.request_redraw(self)
+
+    def layout_sectors(self):
+        """Group the items into the sectors that get drawn.
+
+        With level of detail on, runs of neighbouring items thinner than
+        LOD_MIN_SECTOR_EXTENT are drawn as one arc, which keeps the number
+        of canvas items bounded no matter how many items the wheel has.
+        """
+        self.sectors = []  # [first, last, offset, extent]
+        self.item_sector = []
+        offset = 0
+        for i, (_, size) in enumerate(self.items_with_sizes):
+            extent = size * self.angle_per_unit
+            if (self.level_of_detail and self.sectors
+                    and self.sectors[-1][3] < LOD_MIN_SECTOR_EXTENT
+                    and extent < LOD_MIN_SECTOR_EXTENT):
+                self.sectors[-1][1] = i
+                self.sectors[-1][3] += extent
+            else:
+                self.sectors.append([i, i, offset, extent])
+            self.item_sector.append(len(self.sectors) - 1)
+            offset += extent
+
+    def sector_colors(self, first, last):
+        """Return the (fill, label) colors of a sector"""
+        if self.eliminated and all(i in self.eliminated for i in range(first, last + 1)):
+            return ELIMINATED_COLOR, ELIMINATED_LABEL_COLOR
+        return WHEEL_COLORS[first % len(WHEEL_COLORS)], "white"
+
+    def sector_geometry(self):
+        """Yield (index, first, last, start, extent) for each sector at the current rotation"""
+        for i, (first, last, offset, extent) in enumerate(self.sectors):
+            yield i, first, last, self.rotation + offset, extent
+
+    def label_font_size(self, first, last, extent):
+        """Return the label font size of a sector, or None if it gets no label"""
+        if not self.level_of_detail:
+            return LABEL_FONT_MAX
+        if first != last:
+            return None
+        # Labels run along the radius, so the sector's width limits their height
+        size = min(LABEL_FONT_MAX, int(extent * LABEL_POINTS_PER_DEGREE))
+        return size if size >= LABEL_FONT_MIN else None
+
+    def label_position(self, start_angle, extent):
+        """Return the (x, y, angle) of a sector label"""
+        angle_rad = math.radians(start_angle + extent/2)
+        text_radius = WHEEL_RADIUS * 0.75  # Position text closer to center
+        x = WHEEL_CENTER[0] + text_radius * math.cos(angle_rad)
+        y = WHEEL_CENTER[1] - text_radius * math.sin(angle_rad)
+
+        return x, y, self.text_angle(start_angle + extent/2)
+
+    @staticmethod
+    def text_angle(angle):
+        """Return the angle to draw a label at angle, turned so it never reads upside down"""
+        text_angle = angle % 360
+        if text_angle > 90 and text_angle < 270:
+            text_angle += 180
+        return text_angle
+
+    def build_wheel(self):
+        """Create every canvas item of the wheel from scratch"""
         self.canvas.delete("all")
-        radius = 200
-        center = (250, 250)
-        colors = ["#e74c3c", "#3498db", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c",
-                 "#d35400", "#c0392b", "#16a085", "#8e44ad", "#2c3e50", "#f1c40f"]
+        self.sector_arcs = []
+        self.sector_labels = []
+        self.label_styles = {}
+        self.label_photos = {}
+        self.pointer_label = None
+        self.wheel_image = None
+        radius = WHEEL_RADIUS
+        center = WHEEL_CENTER
 
         # Draw wheel shadow
         shadow_offset = 4
@@ -122,34 +627,10 @@ class SpinTheWheel:
                                fill="#888888", outline="")
 
         # Draw wheel
-        start_angle = self.rotation
-        for i, (item, size) in enumerate(self.items_with_sizes):
-            extent = size * self.angle_per_unit
-            color = colors[i % len(colors)]
-
-            # Draw segment
-            self.canvas.create_arc(
-                center[0]-radius, center[1]-radius,
-                center[0]+radius, center[1]+radius,
-                start=start_angle, extent=extent,
-                fill=color, outline="white", width=2
-            )
-
-            # Text
-            angle_rad = math.radians(start_angle + extent/2)
-            text_radius = radius * 0.75  # Position text closer to center
-            x = center[0] + text_radius * math.cos(angle_rad)
-            y = center[1] - text_radius * math.sin(angle_rad)
-
-            # Adjust text orientation
-            text_angle = start_angle + extent/2
-            if text_angle > 90 and text_angle < 270:
-                text_angle += 180
-
-            self.canvas.create_text(x, y, text=item, font=("Arial", 10, "bold"),
-                                   angle=text_angle, fill="white")
-
-            start_angle += extent
+        if self.render_mode == "pillow":
+            self.build_wheel_image()
+        else:
+            self.build_sectors()
 
         # Draw center circle
         self.canvas.create_oval(center[0]-20, center[1]-20,
@@ -163,43 +644,225 @@ class SpinTheWheel:
         # Draw pointer stand
         self.canvas.create_rectangle(245, 20, 255, 40, fill="#7f8c8d", outline="black", width=1)
 
-    def spin(self):
-        """Start the spinning animation"""
+        self.wheel_built = True
+        if METRICS.enabled:
+            METRICS.set_gauge("spinwheel_canvas_items", len(self.canvas.find_all()),
+                              wheel=self.wheel_name)
+
+    def build_sectors(self):
+        """Create the arc and label items of every sector"""
+        radius = WHEEL_RADIUS
+        center = WHEEL_CENTER
+        label_state = tk.NORMAL if self.labels_visible else tk.HIDDEN
+        for i, first, last, start_angle, extent in self.sector_geometry():
+            color, label_color = self.sector_colors(first, last)
+
+            # Draw segment
+            self.sector_arcs.append(self.canvas.create_arc(
+                center[0]-radius, center[1]-radius,
+                center[0]+radius, center[1]+radius,
+                start=start_angle, extent=extent,
+                fill=color, outline="white", width=2
+            ))
+
+            # Text
+            font_size = self.label_font_size(first, last, extent)
+            if font_size is None:
+                self.sector_labels.append(None)
+                continue
+            x, y, text_angle = self.label_position(start_angle, extent)
+            self.sector_labels.append(self.create_label(
+                x, y, self.items_with_sizes[first][0], font_size, label_color, text_angle, label_state))
+
+        # Items too thin for a label of their own are named next to the pointer
+        if None in self.sector_labels:
+            self.pointer_label = self.canvas.create_text(
+                265, 20, anchor=tk.W, font=("Arial", 10, "bold"), fill="#2c3e50",
+                text=self.item_at_pointer())
+
+    def create_label(self, x, y, text, font_size, color, angle, state):
+        """Create a sector label item, an image when label_images is on"""
+        if not self.label_images:
+            return self.canvas.create_text(x, y, text=text, font=("Arial", font_size, "bold"),
+                                           angle=angle, fill=color, state=state, tags="label")
+        style = [str(text), round(font_size * self.pixels_per_point), color, angle]
+        photo = LABEL_RENDERER.tk_label(*style)
+        label = self.canvas.create_image(x, y, image=photo, state=state, tags="label")
+        self.label_styles[label] = style
+        self.label_photos[label] = photo  # Tk drops images nothing refers to
+        return label
+
+    def turn_label(self, label, x, y, angle):
+        """Move a label and turn it to angle"""
+        self.canvas.coords(label, x, y)
+        if not self.label_images:
+            self.canvas.itemconfigure(label, angle=angle)
+            return
+        style = self.label_styles[label]
+        style[3] = angle
+        photo = LABEL_RENDERER.tk_label(*style)
+        if photo is not self.label_photos[label]:  # Angles are quantized, so often the same
+            self.label_photos[label] = photo
+            self.canvas.itemconfigure(label, image=photo)
+
+    def label_warmup(self, total_degrees, duration):
+        """Return the label images a spin will show that aren't cached yet.
+
+        Labels are hidden while the wheel turns fast and the spin's end is
+        known up front, so these can be rendered before they are needed.
+        """
+        jobs = {}
+        if not (self.label_images and self.level_of_detail and self.wheel_built):
+            return deque()
+        labelled = [(self.label_styles[label], offset + extent / 2)
+                    for label, (_, _, offset, extent) in zip(self.sector_labels, self.sectors)
+                    if label is not None]
+        rotations = spin_rotations(total_degrees, self.fps, duration)
+        frames = len(rotations) - 1
+        for i, rotation in enumerate(rotations):
+            if total_degrees * (2 - 2 * i / frames) / duration / self.fps >= LOD_HIDE_LABEL_SPEED:
+                continue
+            for (text, size, color, _), middle in labelled:
+                angle = self.text_angle(rotation + middle)
+                key = LABEL_RENDERER.label_key(text, size, color, angle)
+                if key not in jobs and key not in LABEL_RENDERER.LABEL_CACHE:
+                    jobs[key] = (text, size, color, angle)
+        return deque(jobs.values())
+
+    def warm_labels(self, budget):
+        """Render queued label images for up to budget seconds"""
+        deadline = time.perf_counter() + budget
+        while self.label_jobs and time.perf_counter() < deadline:
+            LABEL_RENDERER.tk_label(*self.label_jobs.popleft())
+
+    def restyle_label(self, label, font_size=None, color=None):
+        """Change a label's font size or color"""
+        if not self.label_images:
+            if font_size is not None:
+                self.canvas.itemconfigure(label, font=("Arial", font_size, "bold"))
+            if color is not None:
+                self.canvas.itemconfigure(label, fill=color)
+            return
+        style = self.label_styles[label]
+        if font_size is not None:
+            style[1] = round(font_size * self.pixels_per_point)
+        if color is not None:
+            style[2] = color
+        photo = self.label_photos[label] = LABEL_RENDERER.tk_label(*style)
+        self.canvas.itemconfigure(label, image=photo)
+
+    def build_wheel_image(self):
+        """Create the image item showing the pre-rendered wheel bitmap"""
+        if self.renderer is None:
+            # Pillow is only imported once a window actually uses it
+            from wheelrender import PillowWheelRenderer
+
+            self.renderer = PillowWheelRenderer(self.items_with_sizes, self.bitmap_colors(),
+                                                radius=WHEEL_RADIUS, step=self.frame_step)
+        # Keep a reference so Tk doesn't drop the image if the cache evicts it
+        self.wheel_photo = self.renderer.tk_frame(self.rotation)
+        self.wheel_image = self.canvas.create_image(WHEEL_CENTER[0], WHEEL_CENTER[1],
+                                                    image=self.wheel_photo)
+
+    def update_wheel_image(self):
+        """Show the cached bitmap frame for the current rotation"""
+        self.wheel_photo = self.renderer.tk_frame(self.rotation)
+        self.canvas.itemconfigure(self.wheel_image, image=self.wheel_photo)
+
+    def update_wheel(self):
+        """Move the existing sector items to the current rotation"""
+        for i, _, _, start_angle, extent in self.sector_geometry():
+            self.canvas.itemconfigure(self.sector_arcs[i], start=start_angle)
+
+            # Hidden labels are left where they are until they are shown again
+            label = self.sector_labels[i]
+            if label is None or not self.labels_visible:
+                continue
+            x, y, text_angle = self.label_position(start_angle, extent)
+            self.turn_label(label, x, y, text_angle)
+
+        if self.pointer_label is not None:
+            self.canvas.itemconfigure(self.pointer_label, text=self.item_at_pointer())
+
+    def show_labels(self, visible):
+        """Show or hide every sector label"""
+        if visible == self.labels_visible:
+            return
+        self.labels_visible = visible
+        if self.render_mode != "pillow":
+            self.canvas.itemconfigure("label", state=tk.NORMAL if visible else tk.HIDDEN)
+
+    def item_at_pointer(self):
+        """Return the item currently under the pointer"""
+        return self.engine.items[self.engine.winner_index(self.rotation)]
+
+    def spin(self, outcome=None, source=SOURCE_OUTCOME, record=True):
+        """Start the spinning animation, ending on outcome (a SpinOutcome) when given"""
         if self.is_spinning:
             return
 
+        # The outcome is decided before anything moves; the animation only shows it
+        if outcome is None:
+            if self.elimination_var.get():
+                # In elimination mode the winner is drawn among the remaining items
+                if self.eliminator is None:
+                    self.eliminator = EliminationDraw(self.items_with_sizes, seed=self.rng.getrandbits(64))
+                if not self.eliminator.remaining:
+                    self.result_var.set("Every item has been drawn")
+                    return
+                index, fraction = self.eliminator.draw_position()
+                # The draw depends on what was drawn before, so no seed replays it
+                outcome = SpinOutcome(None, index, self.engine.landing_rotation(index, fraction),
+                                      self.rng.randint(5, 8))
+                source = SOURCE_ELIMINATION
+            elif self.planned:
+                outcome = self.planned.popleft()
+            elif self.outcome_first:
+                # Each spin has its own seed, kept in the spin history, to replay it from
+                outcome = self.engine.outcome(self.rng.getrandbits(64))
+            else:
+                outcome = self.engine.free_spin(self.rng.getrandbits(64), self.landing)
+                source = SOURCE_SPIN
+
         self.is_spinning = True
         self.spin_button.config(state=tk.DISABLED)
         if hasattr(self, 'edit_button'):
             self.edit_button.config(state=tk.DISABLED)
-        self.result_var.set("Spinning...")
+        self.result_var.set("Spinning..." if record else "Replaying...")
 
         # Play spin sound if available
-        if self.spin_sound:
-            self.spin_sound.play()
-
-        # Determine spin parameters
-        spins = random.randint(5, 8)  # Number of full rotations
-        total_degrees = spins * 360 + random.randint(0, 359)
-        duration = 4.0  # seconds
-        steps = int(duration * 30)  # 30 FPS
-        step_degrees = total_degrees / steps
-
-        # Easing function for more realistic spin
-        def ease_out_quad(t):
-            return t * (2 - t)
-
-        # Animate the spin
-        start_time = time.time()
-
-        def animate():
-            if not self.is_spinning:
-                return
-
-            elapsed = time.time() - start_time
-            if elapsed > duration:
-                self.finish_spin(total_degrees % 360)
-                return
+        SOUNDS.play("spin")
+
+        total_degrees = outcome.total_degrees
+        duration = SPIN_SECONDS
+        self.label_jobs = self.label_warmup(total_degrees, duration)
+
+        # Animate the spin on the shared clock
+        start_time = time.perf_counter()
+        pacer = self.pacer = FramePacer(self.fps)
+        pacer.start(start_time)
+
+        def step(now):
+            elapsed = now - start_time
+            if elapsed >= duration:
+                self.pacer = None
+                stats = pacer.stats()
+                self.spin_stats.append(stats)
+                self.finish_spin(outcome, source, record)
+                if METRICS.enabled:
+                    METRICS.inc("spinwheel_spins_total")
+                    METRICS.observe("spinwheel_spin_seconds", time.perf_counter() - start_time)
+                    METRICS.inc("spinwheel_frames_rendered_total", stats["rendered"])
+                    METRICS.inc("spinwheel_frames_dropped_total", stats["dropped"])
+                    METRICS.inc("spinwheel_frames_hidden_total", stats["hidden"])
+                return False
+
+            # Windows with a lower fps than the clock skip ticks
+            if not pacer.due(now):
+                return True
+            if not self.is_visible():
+                pacer.frame_hidden(now)
+                return True
 
             # Calculate rotation with easing
             progress = elapsed / duration
@@ -207,43 +870,356 @@ class SpinTheWheel:
             current_rotation = eased_progress * total_degrees
 
             self.rotation = current_rotation % 360
-            self.draw_wheel()
-
-            # Schedule next frame
-            self.root.after(33, animate)  # ~30 FPS
 
-        animate()
-
-    def finish_spin(self, final_rotation):
-        """Finish spinning and determine winner"""
-        self.rotation = final_rotation
-        self.draw_wheel()
-
-        # Determine winner
-        angle = (360 - self.rotation) % 360
-        total_angle = 0
-        winner = None
-
-        for item, size in self.items_with_sizes:
-            extent = size * self.angle_per_unit
-            if total_angle <= angle < total_angle + extent:
-                winner = item
-                break
-            total_angle += extent
+            # Labels can't be read at high speed, so skip them until the wheel slows down
+            if self.level_of_detail:
+                degrees_per_frame = total_degrees * (2 - 2 * progress) / duration / self.fps
+                self.show_labels(degrees_per_frame < LOD_HIDE_LABEL_SPEED)
+                if self.label_jobs and not self.labels_visible:
+                    self.warm_labels(LABEL_WARMUP_SECONDS)
+            self.clock.request_redraw(self)
+            return True
+
+        self.clock.add(self, step, self.fps)
+
+    def finish_spin(self, outcome, source=SOURCE_OUTCOME, record=True):
+        """Finish spinning and show the winner"""
+        self.label_jobs.clear()
+        self.rotation = outcome.rotation
+        self.show_labels(True)
+        self.clock.request_redraw(self)
+
+        winner_index = outcome.index
+        winner = self.items_with_sizes[winner_index][0]
+        self.last_outcome = outcome
+        title = "Winner" if record else "Replayed winner"
+        if source == SOURCE_ELIMINATION:
+            self.draw_rank += 1
+            self.eliminate(winner_index)
+            title = f"Winner #{self.draw_rank}"
+
+        # Queued for the history's writer thread, so this never waits on the disk.
+        # Mirrored spins are recorded by the service and replays were recorded already
+        if record and source != SOURCE_SERVICE:
+            HISTORY.record(self.wheel_name, winner, winner_index, outcome.rotation,
+                           outcome.seed, source, landing=self.landing)
 
         # Display result
         if winner:
-            self.result_var.set(f"🎉 Winner: {winner} 🎉")
+            self.result_var.set(f"🎉 {title}: {winner} 🎉")
 
             # Play win sound if available
-            if self.win_sound:
-                self.win_sound.play()
+            SOUNDS.play("win")
 
         self.is_spinning = False
         self.spin_button.config(state=tk.NORMAL)
         if hasattr(self, 'edit_button'):
             self.edit_button.config(state=tk.NORMAL)
 
+        # Apply changes that arrived while spinning
+        if self.pending_items is not None:
+            items, self.pending_items = self.pending_items, None
+            self.set_items(items)
+
+    def mirror_spin(self, spin):
+        """Replay a spin made through the spin service"""
+        index = spin["index"]
+        if self.is_spinning or index >= len(self.items_with_sizes):
+            return
+        if self.items_with_sizes[index][0] != spin["item"]:
+            return  # The service spun a different version of this wheel
+        self.spin(SpinOutcome(spin.get("seed"), index, spin["rotation"], self.rng.randint(5, 8)),
+                  SOURCE_SERVICE)
+
+    def replay(self, seed, source=SOURCE_OUTCOME, landing=None):
+        """Spin again exactly as the recorded spin with this seed did, free spins with landing"""
+        if self.is_spinning:
+            return
+        if source == SOURCE_OUTCOME:
+            outcome = self.engine.outcome(seed)
+        else:
+            outcome = self.engine.free_spin(seed, landing or self.landing)
+        self.spin(outcome, source, record=False)
+
+    def export_animation(self):
+        """Render the last spin, or a new one, to an animated GIF/WebP or PNG sequence"""
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Export Animation", defaultextension=".gif",
+            filetypes=[("Animated GIF", "*.gif"), ("Animated WebP", "*.webp"),
+                       ("PNG sequence", "*.png")])
+        if not path:
+            return
+        # Pillow and the worker processes are only needed once something is exported
+        from wheelexport import export_spin, summary
+
+        outcome = self.last_outcome or self.engine.outcome(self.rng.getrandbits(64))
+        items, colors = self.items_with_sizes, self.bitmap_colors()
+        result = {}
+
+        def run():
+            try:
+                result["stats"] = export_spin(items, path, outcome=outcome, palette=colors)
+            except (OSError, ValueError) as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.result_var.set("Exporting animation...")
+
+        def poll():
+            if thread.is_alive():
+                self.callbacks.after(100, poll)
+            elif "error" in result:
+                messagebox.showerror("Error", f"Could not export: {result['error']}", parent=self.root)
+            else:
+                self.result_var.set(f"Exported {result['stats']['frames']} frames")
+                messagebox.showinfo("Export Animation", summary(result["stats"]), parent=self.root)
+        poll()
+
+    def bitmap_colors(self):
+        """Return the item colors for Pillow rendering, with eliminated items greyed out"""
+        if not self.eliminated:
+            return WHEEL_COLORS
+        return [ELIMINATED_COLOR if i in self.eliminated else WHEEL_COLORS[i % len(WHEEL_COLORS)]
+                for i in range(len(self.items_with_sizes))]
+
+    # ===========================
+    # Precomputed outcomes
+    # ===========================
+    def precompute_spins(self):
+        """Decide the next spins ahead of time, e.g. before a live event"""
+        count = simpledialog.askinteger("Precompute Spins", "How many spins?", parent=self.root,
+                                        minvalue=1, maxvalue=1000000)
+        if not count:
+            return
+        seed = simpledialog.askstring("Precompute Spins", "Seed (leave empty for a random one):",
+                                      parent=self.root)
+        if seed is None:
+            return
+        self.planned.extend(self.engine.plan(count, seed or self.rng.getrandbits(64)))
+        self.result_var.set(f"{len(self.planned):,} spins planned")
+
+    def save_plan(self):
+        """Write the planned spins as JSON Lines, to publish or load elsewhere"""
+        if not self.planned:
+            messagebox.showinfo("No Plan", "No spins are planned.", parent=self.root)
+            return
+        path = filedialog.asksaveasfilename(parent=self.root, title="Save Plan",
+                                            defaultextension=".jsonl",
+                                            filetypes=[("JSON Lines", "*.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        items = self.engine.items
+        try:
+            write_plan(path, (outcome.to_dict(items) for outcome in self.planned))
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the plan: {e}", parent=self.root)
+
+    def load_plan(self):
+        """Queue the spins of a plan file, recomputed from their seeds"""
+        path = filedialog.askopenfilename(parent=self.root, title="Load Plan",
+                                          filetypes=[("JSON Lines", "*.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            entries = read_plan(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not load the plan: {e}", parent=self.root)
+            return
+
+        # Only the seeds are trusted; a plan made for another version of the wheel shows up here
+        outcomes = [self.engine.outcome(entry["seed"]) for entry in entries]
+        items = self.engine.items
+        changed = sum(1 for entry, outcome in zip(entries, outcomes)
+                      if "item" in entry and entry["item"] != items[outcome.index])
+        if changed and not messagebox.askyesno(
+                "Plan Mismatch", f"{changed:,} of {len(outcomes):,} planned winners differ on this "
+                                 f"version of the wheel. Load the plan anyway?", parent=self.root):
+            return
+        self.planned.extend(outcomes)
+        self.result_var.set(f"{len(self.planned):,} spins planned")
+
+    def clear_plan(self):
+        self.planned.clear()
+        self.result_var.set("")
+
+    def replay_seed(self):
+        """Ask for the seed of a recorded spin and replay it"""
+        seed = simpledialog.askstring("Replay Spin", "Seed of the spin:", parent=self.root)
+        if not seed:
+            return
+        try:
+            self.replay(int(seed))
+        except ValueError:
+            messagebox.showerror("Error", "A seed is a whole number.", parent=self.root)
+
+    def eliminate(self, index):
+        """Grey out an item that can no longer win, redrawing only its sector"""
+        self.eliminated.add(index)
+        if self.render_mode == "pillow":
+            # The bitmap has to be rasterized again with the new colors
+            self.renderer = None
+            self.build_wheel()
+            return
+        if self.render_mode == "immediate":
+            return  # Recolored on the next full redraw
+
+        sector = self.item_sector[index]
+        first, last = self.sectors[sector][:2]
+        color, label_color = self.sector_colors(first, last)
+        self.canvas.itemconfigure(self.sector_arcs[sector], fill=color)
+        if self.sector_labels[sector] is not None:
+            self.restyle_label(self.sector_labels[sector], color=label_color)
+
+    def reset_elimination(self):
+        """Put every eliminated item back on the wheel"""
+        self.eliminator = None
+        self.draw_rank = 0
+        if self.eliminated:
+            self.eliminated = set()
+            self.renderer = None
+            self.build_wheel()
+
+    def set_items(self, items):
+        """Replace the wheel's items and rebuild it"""
+        if self.planned and not same_items(items, self.items_with_sizes):
+            # Planned winners were indices into the old items
+            self.planned.clear()
+            self.result_var.set("Wheel changed, planned spins were dropped")
+        self.eliminator = None
+        self.eliminated = set()
+        self.draw_rank = 0
+        self.pending_weights = {}  # Indices into the old items
+        self.private_wheel = False
+        self.label_index = None
+        self.items_with_sizes = as_wheel(items)
+        self.total = self.items_with_sizes.total
+        self.angle_per_unit = self.items_with_sizes.angle_per_unit
+        self.engine = WheelEngine(self.items_with_sizes)
+        self.layout_sectors()
+        if self.renderer is not None:
+            self.renderer.invalidate()
+            self.renderer = None
+
+        # Rebuild the wheel since the sectors changed
+        self.build_wheel()
+
+    # ===========================
+    # Live sizes
+    # ===========================
+    def update_weights(self, changes, save=True):
+        """Change item sizes while the window is open, e.g. from a live vote feed.
+
+        changes maps item names or indices to new sizes, which may be
+        fractional. Bursts of calls are coalesced into one update per
+        animation frame, which moves the existing sectors instead of
+        rebuilding the wheel, and the sizes are saved in the background at
+        most every WEIGHT_SAVE_MS. Changes arriving mid-spin wait for it to
+        finish, since its winner was drawn with the old sizes. Call it on
+        the Tk thread; WheelManager.post_weights() can be used from others.
+        """
+        resolved = {}
+        for key, size in changes.items():
+            if isinstance(size, bool) or not isinstance(size, numbers.Real) or not 0 < size < math.inf:
+                raise ValueError(f"Invalid size for '{key}'. Size must be a positive number.")
+            # NumPy and other numeric types are stored as plain ints and floats
+            resolved[self.item_index(key)] = int(size) if isinstance(size, numbers.Integral) else float(size)
+        self.pending_weights.update(resolved)
+        if save:
+            self.schedule_weight_save()
+        if not self.is_spinning:
+            self.clock.request_redraw(self)
+
+    def item_index(self, key):
+        """Return the index of an item given by index or name"""
+        if isinstance(key, numbers.Integral) and not isinstance(key, bool):
+            if not 0 <= key < len(self.items_with_sizes):
+                raise ValueError(f"No item number {key}.")
+            return int(key)
+        if self.label_index is None:
+            self.label_index = {}
+            for i, label in enumerate(self.items_with_sizes.labels):
+                self.label_index.setdefault(label, i)
+        if key not in self.label_index:
+            raise ValueError(f"No item named '{key}'.")
+        return self.label_index[key]
+
+    def apply_weights(self):
+        """Apply the collected size changes before the next frame is drawn"""
+        changes, self.pending_weights = self.pending_weights, {}
+        if not self.private_wheel:
+            # The Wheel is shared with the cache and other windows, so change a copy
+            self.items_with_sizes = self.items_with_sizes.copy()
+            self.engine = WheelEngine(self.items_with_sizes)
+            self.private_wheel = True
+        self.engine.set_sizes(changes)
+        if self.eliminator is not None:
+            for index, size in changes.items():
+                self.eliminator.set_size(index, size)
+        self.total = self.items_with_sizes.total
+        self.angle_per_unit = self.items_with_sizes.angle_per_unit
+
+        # Every angle scales with the new total, but the canvas items can
+        # usually stay: only a change in how thin items are grouped, or in
+        # which sectors have room for a label, needs them recreated
+        groups = [sector[:2] for sector in self.sectors]
+        self.layout_sectors()
+        if self.render_mode == "pillow":
+            if self.renderer is not None:
+                self.renderer.invalidate()
+                self.renderer = None
+            self.wheel_built = False
+        elif self.render_mode == "retained" and self.wheel_built:
+            if [sector[:2] for sector in self.sectors] != groups or not self.resize_sectors():
+                self.wheel_built = False
+
+    def resize_sectors(self):
+        """Give the existing arcs and labels their new extents, False if labels come or go"""
+        for i, first, last, start_angle, extent in self.sector_geometry():
+            font_size = self.label_font_size(first, last, extent)
+            label = self.sector_labels[i]
+            if (font_size is None) != (label is None):
+                return False
+            self.canvas.itemconfigure(self.sector_arcs[i], extent=extent)
+            if label is not None:
+                self.restyle_label(label, font_size=font_size)
+        return True
+
+    def schedule_weight_save(self):
+        if self.weight_save_id is None:
+            self.weight_save_id = self.callbacks.after(WEIGHT_SAVE_MS, self.save_weights)
+
+    def save_weights(self):
+        """Hand the current sizes to the wheel writer, which saves them in the background"""
+        self.weight_save_id = None
+        if self.is_spinning:
+            self.schedule_weight_save()  # Changes held back by the spin are saved after it
+            return
+        if self.pending_weights:
+            self.apply_weights()
+        self.saved_wheel = self.items_with_sizes.copy()
+        report_write(WHEEL_WRITER.save(self.wheel_name, self.saved_wheel), self.root, None,
+                     f"Could not save the sizes of wheel '{self.wheel_name}'")
+
+    def on_wheel_changed(self, name, items):
+        """Called by the wheel cache when this wheel was saved or deleted elsewhere"""
+        if self.closed or name != self.wheel_name or items is None:
+            return
+        if items is self.saved_wheel or same_items(items, self.items_with_sizes):
+            return
+        if (not self.is_spinning and self.pending_items is None
+                and items.labels == self.items_with_sizes.labels):
+            # Only sizes changed, e.g. live updates saved by another window
+            sizes = zip(items.sizes, self.items_with_sizes.sizes)
+            self.update_weights({i: size for i, (size, old) in enumerate(sizes) if size != old},
+                                save=False)
+            return
+        if self.is_spinning:
+            self.pending_items = items
+            return
+        self.set_items(items)
+        self.result_var.set(f"Wheel updated: {self.wheel_name}")
+
     def edit_wheel(self):
         """Edit the current wheel"""
         if self.is_spinning:
@@ -257,27 +1233,66 @@ class SpinTheWheel:
             new_name, items = edit_dialog.result
             if new_name and items:
                 # Update the wheel with new data
+                old_name = self.wheel_name
+                if new_name != old_name:
+                    WHEEL_CACHE.unsubscribe(old_name, self.on_wheel_changed)
+                    WHEEL_CACHE.subscribe(new_name, self.on_wheel_changed)
                 self.wheel_name = new_name
-                self.items_with_sizes = items
-                self.total = sum(size for _, size in items)
-                self.angle_per_unit = 360 / self.total
+                self.set_items(items)
 
                 # Update window title
                 self.root.title(f"Spin the Wheel - {self.wheel_name}")
 
-                # Redraw the wheel
-                self.draw_wheel()
-
-                # Save the changes
-                save_wheel(self.wheel_name, self.items_with_sizes)
+                # Save the changes, moving the saved wheel if it was renamed
+                if new_name != old_name:
+                    rename_wheel(old_name, new_name, self.items_with_sizes, self.root)
+                else:
+                    save_wheel(self.wheel_name, self.items_with_sizes, self.root)
 
                 # Show success message
                 self.result_var.set(f"Wheel updated: {self.wheel_name}")
 
     def on_close(self):
-        """Handle window closing"""
+        """Handle window closing: cancel its callbacks, then release what it holds"""
+        if self.closed:
+            return
+        self.closed = True
         self.is_spinning = False
+        self.clock.remove(self)  # Cancels its pending frames
+        self.callbacks.cancel_all()
+        if self.weight_save_id is not None:
+            self.save_weights()
+        WHEEL_CACHE.unsubscribe(self.wheel_name, self.on_wheel_changed)
+        METRICS.remove_gauge("spinwheel_canvas_items", wheel=self.wheel_name)
+        if self.parent_manager:
+            self.parent_manager.windows.discard(self)
+            METRICS.set_gauge("spinwheel_open_windows", len(self.parent_manager.windows))
         self.root.destroy()
+        self.release()
+
+    def release(self):
+        """Drop the closed window's wheel data and images, and its share of the shared resources.
+
+        Anything still holding the window, like a queued callback, then only
+        keeps a small object alive.
+        """
+        self.items_with_sizes = self.saved_wheel = self.pending_items = None
+        self.engine = self.eliminator = self.last_outcome = None
+        self.planned.clear()
+        self.pending_weights = {}
+        self.sectors = []
+        self.item_sector = []
+        self.eliminated = set()
+        self.sector_arcs = []
+        self.sector_labels = []
+        self.label_index = None
+        self.label_styles = {}
+        self.label_photos = {}
+        self.label_jobs.clear()
+        self.renderer = self.wheel_image = self.wheel_photo = None
+        self.spin_stats = []
+        SOUND_USERS.release()
+        IMAGE_USERS.release()
 
 
 # ===========================
@@ -292,29 +1307,63 @@ def ensure_sound_dir():
         os.makedirs(SOUND_DIR)
         print(f"Created {SOUND_DIR} directory. Add spin.wav and win.wav files for sound effects.")
 
+# Listings come straight from the store, so they wait for queued changes first
+@METRICS.timed("spinwheel_storage_seconds", op="list")
 def list_wheels():
-    ensure_wheel_dir()
-    return [f.replace(".json", "") for f in os.listdir(WHEEL_DIR) if f.endswith(".json")]
-
-def save_wheel(name, items_with_sizes):
-    ensure_wheel_dir()
-    path = os.path.join(WHEEL_DIR, f"{name}.json")
-    with open(path, "w") as f:
-        json.dump(items_with_sizes, f)
-    print(f"✅ Wheel '{name}' saved.")
-
+    WHEEL_WRITER.flush()
+    return get_store().list_wheels()
+
+@METRICS.timed("spinwheel_storage_seconds", op="count")
+def count_wheels(prefix=""):
+    WHEEL_WRITER.flush()
+    return get_store().count_wheels(prefix)
+
+# Changes are queued on the wheel writer, so the calling (Tk) thread doesn't wait
+# on the disk; the writer times the store calls. Loads see queued changes at once.
+# The result is reported on widget's Tk thread when one is given
+@METRICS.timed("spinwheel_storage_queue_seconds", op="save")
+def save_wheel(name, items_with_sizes, widget=None):
+    future = WHEEL_WRITER.save(name, items_with_sizes)
+    if widget is not None:
+        report_write(future, widget, f"✅ Wheel '{name}' saved.", f"Could not save wheel '{name}'")
+    return future
+
+@METRICS.timed("spinwheel_storage_queue_seconds", op="rename")
+def rename_wheel(old, new, items_with_sizes, widget=None):
+    future = WHEEL_WRITER.rename(old, new, items_with_sizes)
+    if widget is not None:
+        report_write(future, widget, f"✅ Wheel '{old}' saved as '{new}'.",
+                     f"Could not save wheel '{old}' as '{new}'")
+    return future
+
+@METRICS.timed("spinwheel_storage_seconds", op="load")
 def load_wheel(name):
-    path = os.path.join(WHEEL_DIR, f"{name}.json")
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return None
+    return WHEEL_CACHE.get(name)
+
+@METRICS.timed("spinwheel_storage_queue_seconds", op="delete")
+def delete_wheel(name, widget=None):
+    future = WHEEL_WRITER.delete(name)
+    if widget is not None:
+        report_write(future, widget, f"🗑️ Wheel '{name}' deleted.", f"Could not delete wheel '{name}'")
+    return future
+
+def report_write(future, widget, done, failed):
+    """Once a queued change is written, print done, or show failed with the error, on widget's Tk thread"""
+    def written(future):
+        try:
+            widget.after(0, show_write_result, future, widget, done, failed)
+        except (RuntimeError, tk.TclError):
+            pass  # The window closed before the write finished
+
+    future.add_done_callback(written)
 
-def delete_wheel(name):
-    path = os.path.join(WHEEL_DIR, f"{name}.json")
-    if os.path.exists(path):
-        os.remove(path)
-        print(f"🗑️ Wheel '{name}' deleted.")
+def show_write_result(future, widget, done, failed):
+    error = future.exception()
+    if error is None:
+        if done and future.result():
+            print(done)
+    else:
+        messagebox.showerror("Error", f"{failed}:\n{error}", parent=widget)
 
 
 # ===========================
@@ -324,7 +1373,7 @@ class WheelManager:
     def __init__(self, root):
         self.root = root
         self.root.title("Spin The Wheel Manager")
-        self.root.geometry("600x550")
+        self.root.geometry("600x620")
         self.root.configure(bg="#f0f0f0")
         self.root.resizable(False, False)
 
@@ -359,6 +1408,22 @@ class WheelManager:
         tk.Button(main_frame, text="Delete Wheel", command=self.delete_wheel,
                  bg="#e74c3c", fg="white", **button_style).pack(pady=10)
 
+        io_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        io_frame.pack(pady=10)
+        half_button_style = dict(button_style, width=9)
+
+        tk.Button(io_frame, text="Import", command=self.import_wheel,
+                 bg="#16a085", fg="white", **half_button_style).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(io_frame, text="Export", command=self.export_wheel,
+                 bg="#8e44ad", fg="white", **half_button_style).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(io_frame, text="History", command=self.show_history,
+                 bg="#2c3e50", fg="white", **half_button_style).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(io_frame, text="Diagnostics", command=self.show_diagnostics,
+                 bg="#7f8c8d", fg="white", **dict(half_button_style, width=11)).pack(side=tk.LEFT, padx=5)
+
         tk.Button(main_frame, text="Exit", command=self.root.quit,
                  bg="#95a5a6", fg="white", **button_style).pack(pady=10)
 
@@ -369,16 +1434,90 @@ class WheelManager:
                              font=("Arial", 10), bg="#bdc3c7", fg="#2c3e50", relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+        # Open SpinTheWheel windows, their shared animation clock, and the
+        # spin service when one is running
+        self.windows = set()
+        self.clock = AnimationClock(self.root)
+        self.service = None
+        self.memory_baseline = None  # tracemalloc snapshot diagnostics() compares with
+
         # Initialize directories
         ensure_wheel_dir()
         ensure_sound_dir()
 
+        # Wheel cache callbacks may come from its polling thread, so they
+        # are queued and run on the Tk thread
+        self.wheel_updates = queue.Queue()
+        WHEEL_CACHE.dispatch = lambda callback, *args: self.wheel_updates.put((callback, args))
+        WHEEL_CACHE.start_polling()
+        self.process_wheel_updates()
+
     def center_window(self):
         """Center the window on screen"""
         self.root.update_idletasks()
         x = (self.root.winfo_screenwidth() // 2) - (600 // 2)
-        y = (self.root.winfo_screenheight() // 2) - (550 // 2)
-        self.root.geometry(f"600x550+{x}+{y}")
+        y = (self.root.winfo_screenheight() // 2) - (620 // 2)
+        self.root.geometry(f"600x620+{x}+{y}")
+
+    def process_wheel_updates(self):
+        """Run queued wheel cache callbacks on the Tk thread"""
+        while True:
+            try:
+                callback, args = self.wheel_updates.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except tk.TclError:
+                pass  # The window closed while the update was queued
+        self.root.after(100, self.process_wheel_updates)
+
+    def start_service(self, host, port, mirror=False):
+        """Serve spins over HTTP/WebSocket, optionally replaying them in open windows"""
+        from wheelserver import SpinService
+
+        self.service = SpinService(history=HISTORY)
+        if mirror:
+            # Spins arrive on the service thread, so they go through the Tk-side queue
+            self.service.add_listener(
+                lambda spins: self.wheel_updates.put((self.mirror_spins, (spins,))))
+        self.service.start_in_thread(host, port)
+        self.status_var.set(f"Spin service on http://{host}:{port}")
+
+    def mirror_spins(self, spins):
+        """Animate the last service spin of each wheel in its open windows"""
+        latest = {spin["wheel"]: spin for spin in spins}
+        for window in list(self.windows):
+            spin = latest.get(window.wheel_name)
+            if spin is not None:
+                window.mirror_spin(spin)
+
+    def post_weights(self, wheel_name, changes):
+        """Queue live size changes for the open windows of a wheel; safe to call from any thread"""
+        self.wheel_updates.put((self.apply_posted_weights, (wheel_name, changes)))
+
+    def apply_posted_weights(self, wheel_name, changes):
+        save = True  # One window saves, the others follow
+        for window in list(self.windows):
+            if window.wheel_name == wheel_name:
+                try:
+                    window.update_weights(changes, save)
+                except ValueError as e:
+                    print(f"Ignored size update for '{wheel_name}': {e}")
+                    return
+                save = False
+
+    def replay_spin(self, wheel_name, seed, source, landing=None):
+        """Replay a recorded spin in a window of its wheel, opening one if needed"""
+        window = next((w for w in self.windows if w.wheel_name == wheel_name), None)
+        if window is None:
+            items = load_wheel(wheel_name)
+            if items is None:
+                messagebox.showerror("Error", f"Could not load wheel '{wheel_name}'")
+                return
+            window = SpinTheWheel(wheel_name, items, self)
+        window.root.lift()
+        window.replay(seed, source, landing)
 
     def create_wheel(self):
         """Create a new wheel"""
@@ -388,18 +1527,17 @@ class WheelManager:
         if dialog.result:
             name, items = dialog.result
             if name and items:
-                save_wheel(name, items)
+                save_wheel(name, items, self.root)
                 SpinTheWheel(name, items, self)  # Pass self as parent_manager
                 self.status_var.set(f"Created wheel: {name}")
 
     def load_wheel(self):
         """Load an existing wheel"""
-        wheels = list_wheels()
-        if not wheels:
+        if not count_wheels():
             messagebox.showinfo("No Wheels", "No wheels saved yet.")
             return
 
-        dialog = WheelSelector(self.root, wheels, "Select Wheel to Load")
+        dialog = WheelSelector(self.root, "Select Wheel to Load")
         self.root.wait_window(dialog.top)
 
         if dialog.selected:
@@ -411,12 +1549,11 @@ class WheelManager:
 
     def edit_wheel(self):
         """Edit an existing wheel"""
-        wheels = list_wheels()
-        if not wheels:
+        if not count_wheels():
             messagebox.showinfo("No Wheels", "No wheels saved yet.")
             return
 
-        dialog = WheelSelector(self.root, wheels, "Select Wheel to Edit")
+        dialog = WheelSelector(self.root, "Select Wheel to Edit")
         self.root.wait_window(dialog.top)
 
         if dialog.selected:
@@ -430,30 +1567,431 @@ class WheelManager:
                 if edit_dialog.result:
                     new_name, items = edit_dialog.result
                     if new_name and items:
-                        # If name changed, delete old file
                         if new_name != name:
-                            delete_wheel(name)
-                        save_wheel(new_name, items)
+                            rename_wheel(name, new_name, items, self.root)
+                        else:
+                            save_wheel(new_name, items, self.root)
                         self.status_var.set(f"Updated wheel: {new_name}")
                         messagebox.showinfo("Success", f"Wheel '{new_name}' has been updated.")
 
     def delete_wheel(self):
         """Delete a wheel"""
-        wheels = list_wheels()
-        if not wheels:
+        if not count_wheels():
             messagebox.showinfo("No Wheels", "No wheels saved yet.")
             return
 
-        dialog = WheelSelector(self.root, wheels, "Select Wheel to Delete")
+        dialog = WheelSelector(self.root, "Select Wheel to Delete")
         self.root.wait_window(dialog.top)
 
         if dialog.selected:
             name = dialog.selected
             if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{name}'?"):
-                delete_wheel(name)
+                delete_wheel(name, self.root)
                 self.status_var.set(f"Deleted wheel: {name}")
                 messagebox.showinfo("Deleted", f"Wheel '{name}' has been deleted.")
 
+    def import_wheel(self):
+        """Create a wheel from a CSV, JSON Lines or text file"""
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Import Wheel",
+            filetypes=[("Wheel items", "*.txt *.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
+            return
+
+        default_name = os.path.splitext(os.path.basename(path))[0]
+        name = simpledialog.askstring("Import Wheel", "Wheel name:",
+                                      initialvalue=default_name, parent=self.root)
+        if not name or not name.strip():
+            return
+        name = name.strip()
+
+        dialog = ImportDialog(self.root, path, name)
+        self.root.wait_window(dialog.top)
+
+        if dialog.error:
+            messagebox.showerror("Import Failed", f"Could not import {path}:\n{dialog.error}")
+            return
+
+        result = dialog.result
+        if result.cancelled:
+            self.status_var.set("Import cancelled")
+            return
+        if not result.items:
+            messagebox.showerror("Import Failed", result.error_report())
+            return
+
+        message = f"Imported {len(result.items)} items into '{name}'."
+        self.status_var.set(f"Imported wheel: {name}")
+        if result.errors:
+            message += f"\n\n{len(result.errors)} invalid lines were skipped:\n{result.error_report()}"
+            messagebox.showwarning("Imported", message)
+        else:
+            messagebox.showinfo("Imported", message)
+
+    def export_wheel(self):
+        """Write a wheel's items to a CSV, JSON Lines or text file"""
+        if not count_wheels():
+            messagebox.showinfo("No Wheels", "No wheels saved yet.")
+            return
+
+        dialog = WheelSelector(self.root, "Select Wheel to Export")
+        self.root.wait_window(dialog.top)
+
+        if dialog.selected:
+            name = dialog.selected
+            data = load_wheel(name)
+            if not data:
+                return
+            path = filedialog.asksaveasfilename(
+                parent=self.root, title="Export Wheel", initialfile=name, defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Text", "*.txt")])
+            if not path:
+                return
+            try:
+                export_wheel(data, path)
+            except OSError as e:
+                messagebox.showerror("Export Failed", f"Could not write {path}:\n{e}")
+                return
+            self.status_var.set(f"Exported wheel: {name}")
+
+    def show_history(self):
+        """Show a wheel's spin statistics"""
+        if not count_wheels():
+            messagebox.showinfo("No Wheels", "No wheels saved yet.")
+            return
+
+        dialog = WheelSelector(self.root, "Select Wheel")
+        self.root.wait_window(dialog.top)
+
+        if dialog.selected:
+            HistoryView(self.root, dialog.selected, manager=self)
+
+    def show_diagnostics(self):
+        DiagnosticsView(self.root, self)
+
+    def diagnostics(self, top=10):
+        """Return what the session holds, to check that it stays flat over a long run.
+
+        Covers open windows with their canvas items and pending callbacks,
+        closed windows still in memory, shared resource users, cache sizes
+        and, while tracemalloc traces, memory with its top allocation sites,
+        ranked by growth since memory_baseline once that is set.
+        """
+        windows = [{"wheel": window.wheel_name, "items": len(window.items_with_sizes),
+                    "canvas_items": len(window.canvas.find_all()),
+                    "callbacks": len(window.callbacks), "spinning": window.is_spinning}
+                   for window in sorted(self.windows, key=lambda window: window.wheel_name)]
+        info = {
+            "windows": windows,
+            "canvas_items": sum(window["canvas_items"] for window in windows),
+            # Closed windows something still refers to; stays at 0 without leaks
+            "closed_windows_alive": sum(1 for window in list(SpinTheWheel.instances) if window.closed),
+            "animating_windows": len(self.clock.animations),
+            "shared_resources": {resource.name: resource.users for resource in SHARED_RESOURCES},
+            "wheel_cache_entries": len(WHEEL_CACHE.entries),
+        }
+        renderer = sys.modules.get("wheelrender")
+        if renderer is not None:
+            info["label_cache_bytes"] = renderer.LABEL_CACHE.current_bytes
+            info["frame_cache_bytes"] = renderer.FRAME_CACHE.current_bytes
+        info["memory"] = memory_stats(top, self.memory_baseline)
+        METRICS.set_gauge("spinwheel_open_windows", len(windows))
+        if info["memory"] is not None:
+            METRICS.set_gauge("spinwheel_traced_memory_bytes", info["memory"]["current"])
+        return info
+
+
+class HistoryView:
+    """Window with a wheel's win counts, streaks and last results"""
+    def __init__(self, parent, wheel_name, last=20, manager=None):
+        self.wheel_name = wheel_name
+        self.manager = manager
+        self.seeds = {}  # Treeview row -> (seed, source, landing) of spins that can be replayed
+        self.top = tk.Toplevel(parent)
+        self.top.title(f"History - {wheel_name}")
+        self.top.geometry("500x560")
+        self.top.configure(bg="#f0f0f0")
+
+        self.summary_var = tk.StringVar(value="Reading history...")
+        tk.Label(self.top, textvariable=self.summary_var, font=("Arial", 12), bg="#f0f0f0",
+                justify=tk.LEFT).pack(pady=(15, 10), padx=20, anchor=tk.W)
+
+        tk.Label(self.top, text="Wins", font=("Arial", 12, "bold"), bg="#f0f0f0").pack(padx=20, anchor=tk.W)
+        self.wins = ttk.Treeview(self.top, columns=("item", "wins", "share"), show="headings", height=8)
+        for column, width in (("item", 260), ("wins", 90), ("share", 90)):
+            self.wins.heading(column, text=column.title())
+            self.wins.column(column, width=width, anchor=tk.W if column == "item" else tk.E)
+        self.wins.pack(padx=20, pady=(0, 10), fill=tk.X)
+
+        tk.Label(self.top, text=f"Last {last} results", font=("Arial", 12, "bold"),
+                bg="#f0f0f0").pack(padx=20, anchor=tk.W)
+        self.recent = ttk.Treeview(self.top, columns=("time", "item", "source"), show="headings", height=8)
+        for column, width in (("time", 150), ("item", 200), ("source", 90)):
+            self.recent.heading(column, text=column.title())
+            self.recent.column(column, width=width)
+        self.recent.pack(padx=20, pady=(0, 10), fill=tk.X)
+
+        button_frame = tk.Frame(self.top, bg="#f0f0f0")
+        button_frame.pack(pady=5)
+        if manager is not None:
+            tk.Button(button_frame, text="Replay", command=self.replay, font=("Arial", 12), width=10,
+                     bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
+            self.recent.bind("<Double-1>", lambda event: self.replay())
+        tk.Button(button_frame, text="Close", command=self.top.destroy, font=("Arial", 12), width=10,
+                 bg="#95a5a6", fg="white").pack(side=tk.LEFT, padx=5)
+
+        # Scanning a long history can take a moment, so it runs off the Tk thread
+        self.stats = None
+        self.error = None
+
+        def run():
+            try:
+                self.stats = HISTORY.stats(wheel_name, last)
+            except (OSError, ValueError) as e:
+                self.error = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.poll()
+
+    def poll(self):
+        if self.thread.is_alive():
+            self.top.after(50, self.poll)
+            return
+        if self.error is not None:
+            self.summary_var.set(f"Could not read the history: {self.error}")
+            return
+        self.show(self.stats)
+
+    def show(self, stats):
+        if not stats["spins"]:
+            self.summary_var.set("No spins recorded yet.")
+            return
+        longest, current = stats["longest_streak"], stats["current_streak"]
+        self.summary_var.set(f"{stats['spins']:,} spins\n"
+                             f"Longest streak: {longest[0]} x{longest[1]}\n"
+                             f"Current streak: {current[0]} x{current[1]}")
+        for item, count in stats["wins"]:
+            self.wins.insert("", tk.END, values=(item, f"{count:,}", f"{count / stats['spins']:.1%}"))
+        for result in stats["last"]:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["time"]))
+            row = self.recent.insert("", tk.END, values=(stamp, result["item"], result["source"]))
+            if result["replayable"]:
+                # Service spins are outcome-first too
+                source = SOURCE_SPIN if result["source"] == SOURCE_NAMES[SOURCE_SPIN] else SOURCE_OUTCOME
+                self.seeds[row] = (result["seed"], source, result["landing"])
+
+    def replay(self):
+        """Replay the selected result from its recorded seed"""
+        selection = self.recent.selection()
+        if not selection:
+            return
+        if selection[0] not in self.seeds:
+            messagebox.showinfo("Replay", "Only spins recorded with a seed can be replayed.",
+                                parent=self.top)
+            return
+        seed, source, landing = self.seeds[selection[0]]
+        self.manager.replay_spin(self.wheel_name, seed, source, landing)
+
+
+# ===========================
+# Diagnostics
+# ===========================
+def memory_stats(top=10, baseline=None):
+    """Return traced memory and the top allocation sites, or None unless tracemalloc is tracing.
+
+    With a baseline snapshot the sites are ranked by growth since it.
+    """
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),))
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, "lineno")
+        sites = [{"where": str(stat.traceback[0]), "bytes": stat.size, "growth": stat.size_diff}
+                 for stat in stats[:top]]
+    else:
+        sites = [{"where": str(stat.traceback[0]), "bytes": stat.size}
+                 for stat in snapshot.statistics("lineno")[:top]]
+    return {"current": current, "peak": peak, "sites": sites}
+
+
+class DiagnosticsView:
+    """Window refreshing WheelManager.diagnostics(), to check a long session stays flat"""
+    def __init__(self, parent, manager):
+        self.manager = manager
+        self.top = tk.Toplevel(parent)
+        self.top.title("Diagnostics")
+        self.top.geometry("640x560")
+        self.top.configure(bg="#f0f0f0")
+        self.callbacks = AfterCallbacks(self.top)
+
+        self.text = tk.Text(self.top, font=("Courier", 10), wrap=tk.NONE, height=28)
+        self.text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        button_frame = tk.Frame(self.top, bg="#f0f0f0")
+        button_frame.pack(pady=(0, 10))
+        self.trace_button = tk.Button(button_frame, command=self.toggle_tracing, font=("Arial", 12),
+                                      width=14, bg="#3498db", fg="white")
+        self.trace_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Set Baseline", command=self.set_baseline, font=("Arial", 12),
+                 width=12, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Collect Garbage", command=self.collect, font=("Arial", 12),
+                 width=14, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=self.close, font=("Arial", 12), width=10,
+                 bg="#95a5a6", fg="white").pack(side=tk.LEFT, padx=5)
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        import tracemalloc
+
+        self.trace_button.config(text="Stop Tracing" if tracemalloc.is_tracing() else "Start Tracing")
+        info = self.manager.diagnostics()
+        lines = [f"Open windows: {len(info['windows'])}   canvas items: {info['canvas_items']:,}   "
+                 f"animating: {info['animating_windows']}"]
+        for window in info["windows"]:
+            lines.append(f"  {window['wheel'][:30]:30} {window['items']:>8,} items "
+                         f"{window['canvas_items']:>7,} canvas items {window['callbacks']:>3} callbacks"
+                         + ("  spinning" if window["spinning"] else ""))
+        lines.append(f"Closed windows still alive: {info['closed_windows_alive']}")
+        lines.append("Shared resources in use by: " + ", ".join(
+            f"{name} {users}" for name, users in info["shared_resources"].items()))
+        lines.append(f"Wheel cache: {info['wheel_cache_entries']} wheels")
+        if "label_cache_bytes" in info:
+            lines.append(f"Label images: {info['label_cache_bytes'] / 2**20:.1f} MiB   "
+                         f"wheel frames: {info['frame_cache_bytes'] / 2**20:.1f} MiB")
+        memory = info["memory"]
+        if memory is None:
+            lines.append("\nMemory isn't traced. Start tracing, or run with --trace-memory.")
+        else:
+            lines.append(f"\nTraced memory: {memory['current'] / 2**20:.1f} MiB "
+                         f"(peak {memory['peak'] / 2**20:.1f} MiB)")
+            if self.manager.memory_baseline is not None:
+                lines.append("Largest growth since the baseline:")
+                lines.extend(f"  {site['growth'] / 1024:+10.1f} KiB  {site['where']}"
+                             for site in memory["sites"])
+            else:
+                lines.append("Largest allocation sites:")
+                lines.extend(f"  {site['bytes'] / 1024:10.1f} KiB  {site['where']}"
+                             for site in memory["sites"])
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+        self.callbacks.after(DIAGNOSTICS_MS, self.refresh)
+
+    def toggle_tracing(self):
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.manager.memory_baseline = None
+        else:
+            tracemalloc.start()
+        self.callbacks.cancel_all()
+        self.refresh()
+
+    def set_baseline(self):
+        """Compare memory with now from here on, after collecting garbage"""
+        import gc
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        gc.collect()
+        self.manager.memory_baseline = tracemalloc.take_snapshot()
+        self.callbacks.cancel_all()
+        self.refresh()
+
+    def collect(self):
+        import gc
+
+        gc.collect()
+        self.callbacks.cancel_all()
+        self.refresh()
+
+    def close(self):
+        self.callbacks.cancel_all()
+        self.top.destroy()
+
+
+class ImportDialog:
+    """Progress dialog for importing a wheel on a background thread"""
+    def __init__(self, parent, path, name):
+        self.top = tk.Toplevel(parent)
+        self.top.title("Import Wheel")
+        self.top.geometry("400x170")
+        self.top.configure(bg="#f0f0f0")
+        self.top.resizable(False, False)
+        self.top.transient(parent)
+        self.top.grab_set()
+
+        # Center the dialog
+        self.top.update_idletasks()
+        x = (self.top.winfo_screenwidth() // 2) - (400 // 2)
+        y = (self.top.winfo_screenheight() // 2) - (170 // 2)
+        self.top.geometry(f"400x170+{x}+{y}")
+
+        self.result = None
+        self.error = None
+        self.progress_state = (0, 0, 1)
+        self.cancel_event = threading.Event()
+
+        tk.Label(self.top, text=f"Importing {os.path.basename(path)}...",
+                font=("Arial", 12), bg="#f0f0f0").pack(pady=(20, 5))
+
+        self.progress = ttk.Progressbar(self.top, length=340, mode="determinate", maximum=100)
+        self.progress.pack(pady=5)
+
+        self.status_var = tk.StringVar(value="Starting...")
+        tk.Label(self.top, textvariable=self.status_var, font=("Arial", 10), bg="#f0f0f0").pack()
+
+        tk.Button(self.top, text="Cancel", command=self.cancel,
+                 font=("Arial", 12), width=10, bg="#95a5a6", fg="white").pack(pady=10)
+        self.top.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.thread = threading.Thread(target=self.run, args=(path, name), daemon=True)
+        self.thread.start()
+        self.poll()
+
+    def run(self, path, name):
+        """Import the file, called on the background thread"""
+        try:
+            # Waits for the write, so a failed save is reported as a failed import
+            def save(name, items):
+                save_wheel(name, items).result()
+
+            self.result = import_wheel(path, name, save=save, progress=self.on_progress,
+                                       cancel=self.cancel_event)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.error = e
+
+    def on_progress(self, lines, bytes_read, total_bytes):
+        """Record progress, called on the background thread"""
+        self.progress_state = (lines, bytes_read, total_bytes)
+
+    def poll(self):
+        """Show the latest progress until the import finishes"""
+        lines, bytes_read, total_bytes = self.progress_state
+        self.progress["value"] = 100 * bytes_read / max(total_bytes, 1)
+        if not self.cancel_event.is_set():
+            self.status_var.set(f"{lines:,} lines read")
+
+        if self.thread.is_alive():
+            self.top.after(100, self.poll)
+        else:
+            self.top.destroy()
+
+    def cancel(self):
+        """Handle Cancel button"""
+        self.cancel_event.set()
+        self.status_var.set("Cancelling...")
+
 
 class WheelDialog:
     """Dialog for creating or editing a wheel"""
@@ -534,25 +2072,20 @@ class WheelDialog:
             return
 
         items_with_sizes = []
-        for line in items_text.split("\n"):
+        errors = []
+        for number, line in enumerate(items_text.split("\n"), 1):
             line = line.strip()
             if not line:
                 continue
 
-            if ":" in line:
-                parts = line.split(":", 1)
-                item = parts[0].strip()
-                try:
-                    size = int(parts[1].strip())
-                    if size <= 0:
-                        raise ValueError
-                    items_with_sizes.append((item, size))
-                except ValueError:
-                    messagebox.showerror("Error", f"Invalid size for '{item}'. Size must be a positive integer.")
-                    return
-            else:
-                # Default size is 1 if not specified
-                items_with_sizes.append((line, 1))
+            try:
+                items_with_sizes.append(parse_text_line(line))
+            except LineError as e:
+                errors.append(f"Line {number}: {e}")
+
+        if errors:
+            messagebox.showerror("Error", "\n".join(errors[:20]))
+            return
 
         if len(items_with_sizes) < 2:
             messagebox.showerror("Error", "Need at least 2 items.")
@@ -567,11 +2100,20 @@ class WheelDialog:
 
 
 class WheelSelector:
-    """Dialog for selecting a wheel"""
-    def __init__(self, parent, wheels, title):
+    """Dialog for selecting a wheel.
+
+    Only the visible rows exist: they are fetched a page at a time from the
+    store, which keeps its names sorted, so opening, scrolling and every
+    keystroke of the name filter cost the same with 50 or 50,000 wheels.
+    """
+    ROWS = 12
+
+    def __init__(self, parent, title, store=None):
+        WHEEL_WRITER.flush()  # Pages come straight from the store
+        self.store = store if store is not None else get_store()
         self.top = tk.Toplevel(parent)
         self.top.title(title)
-        self.top.geometry("400x300")
+        self.top.geometry("480x420")
         self.top.configure(bg="#f0f0f0")
         self.top.resizable(False, False)
         self.top.transient(parent)
@@ -579,30 +2121,46 @@ class WheelSelector:
 
         # Center the dialog
         self.top.update_idletasks()
-        x = (self.top.winfo_screenwidth() // 2) - (400 // 2)
-        y = (self.top.winfo_screenheight() // 2) - (300 // 2)
-        self.top.geometry(f"400x300+{x}+{y}")
+        x = (self.top.winfo_screenwidth() // 2) - (480 // 2)
+        y = (self.top.winfo_screenheight() // 2) - (420 // 2)
+        self.top.geometry(f"480x420+{x}+{y}")
 
         self.selected = None
-
-        tk.Label(self.top, text="Select a wheel:", font=("Arial", 12), bg="#f0f0f0").pack(pady=20)
+        self.prefix = ""
+        self.count = 0  # Wheels matching the prefix
+        self.offset = 0  # Position of the first visible row among them
+        self.cursor = None  # Position of the highlighted wheel
+        self.rows = []  # Names of the visible rows
+
+        tk.Label(self.top, text="Select a wheel, or type the start of its name:",
+                font=("Arial", 12), bg="#f0f0f0").pack(pady=(15, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.set_prefix(self.filter_var.get()))
+        entry = tk.Entry(self.top, textvariable=self.filter_var, font=("Arial", 12), width=36)
+        entry.pack(pady=(0, 10))
 
         frame = tk.Frame(self.top, bg="#f0f0f0")
         frame.pack(fill=tk.BOTH, expand=True, padx=20)
 
-        self.listbox = tk.Listbox(frame, font=("Arial", 12), selectmode=tk.SINGLE)
-        scrollbar = tk.Scrollbar(frame, command=self.listbox.yview)
-        self.listbox.configure(yscrollcommand=scrollbar.set)
+        self.tree = ttk.Treeview(frame, columns=("name", "items", "modified"), show="headings",
+                                 height=self.ROWS, selectmode="browse")
+        for column, heading, width in (("name", "Name", 220), ("items", "Items", 60),
+                                       ("modified", "Modified", 130)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.W if column == "name" else tk.E,
+                             stretch=column == "name")
+        self.scrollbar = tk.Scrollbar(frame, command=self.on_scroll)
 
-        for wheel in wheels:
-            self.listbox.insert(tk.END, wheel)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.status_var = tk.StringVar()
+        tk.Label(self.top, textvariable=self.status_var, font=("Arial", 10), fg="#7f8c8d",
+                bg="#f0f0f0").pack(pady=(5, 0))
 
         # Buttons
         button_frame = tk.Frame(self.top, bg="#f0f0f0")
-        button_frame.pack(pady=20)
+        button_frame.pack(pady=15)
 
         tk.Button(button_frame, text="Select", command=self.select,
                  font=("Arial", 12), width=10, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=10)
@@ -610,17 +2168,97 @@ class WheelSelector:
         tk.Button(button_frame, text="Cancel", command=self.cancel,
                  font=("Arial", 12), width=10, bg="#95a5a6", fg="white").pack(side=tk.LEFT, padx=10)
 
-        # Bind double-click
-        self.listbox.bind("<Double-Button-1>", lambda e: self.select())
+        # Mouse and keyboard scroll the virtual list, not the Treeview's few rows
+        self.tree.bind("<Double-Button-1>", lambda e: self.select())
+        self.tree.bind("<<TreeviewSelect>>", self.on_click)
+        for widget in (self.tree, entry):
+            widget.bind("<MouseWheel>", lambda e: self.scroll_to(self.offset - e.delta // 120 * 3))
+            widget.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+            widget.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+            widget.bind("<Up>", lambda e: self.move_cursor(-1))
+            widget.bind("<Down>", lambda e: self.move_cursor(1))
+            widget.bind("<Prior>", lambda e: self.move_cursor(-self.ROWS))
+            widget.bind("<Next>", lambda e: self.move_cursor(self.ROWS))
+            widget.bind("<Return>", lambda e: self.select())
+        self.top.bind("<Escape>", lambda e: self.cancel())
+
+        self.set_prefix("")
+        entry.focus()
+
+    def set_prefix(self, prefix):
+        """Filter to the wheels whose names start with prefix"""
+        self.prefix = prefix
+        self.count = self.store.count_wheels(prefix)
+        self.offset = 0
+        self.cursor = 0 if self.count else None
+        self.status_var.set(f"{self.count:,} wheels" if not prefix else
+                            f"{self.count:,} wheels starting with '{prefix}'")
+        self.fill()
+
+    def fill(self):
+        """Fetch and show the page of rows starting at offset"""
+        infos = self.store.list_wheel_info(self.prefix, self.offset, self.ROWS)
+        self.tree.delete(*self.tree.get_children())
+        self.rows = []
+        for info in infos:
+            modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["modified"]))
+            row = self.tree.insert("", tk.END, values=(info["name"], f"{info['item_count']:,}", modified))
+            self.rows.append((row, info["name"]))
+
+        # The scrollbar stands for the whole list, not the rows that exist
+        if self.count:
+            self.scrollbar.set(self.offset / self.count, (self.offset + len(self.rows)) / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+        self.show_cursor()
+
+    def show_cursor(self):
+        """Highlight the cursor's row if it is on screen"""
+        if self.cursor is not None and 0 <= self.cursor - self.offset < len(self.rows):
+            self.tree.selection_set(self.rows[self.cursor - self.offset][0])
+        elif self.tree.selection():
+            self.tree.selection_set(())
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, self.count - self.ROWS))
+        if offset != self.offset:
+            self.offset = offset
+            self.fill()
+        return "break"
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.count))
+        else:
+            self.scroll_to(self.offset + int(amount) * (self.ROWS if unit == "pages" else 1))
+
+    def move_cursor(self, delta):
+        if self.cursor is None:
+            return "break"
+        self.cursor = max(0, min(self.cursor + delta, self.count - 1))
+        if self.cursor < self.offset:
+            self.scroll_to(self.cursor)
+        elif self.cursor >= self.offset + self.ROWS:
+            self.scroll_to(self.cursor - self.ROWS + 1)
+        else:
+            self.show_cursor()
+        return "break"
+
+    def on_click(self, event):
+        for i, (row, _) in enumerate(self.rows):
+            if row in self.tree.selection():
+                self.cursor = self.offset + i
 
     def select(self):
         """Handle selection"""
-        selection = self.listbox.curselection()
-        if not selection:
-            messagebox.showwarning("No Selection", "Please select a wheel.")
+        # The cursor may have been scrolled out of view
+        names = [] if self.cursor is None else self.store.list_wheels(self.prefix, self.cursor, 1)
+        if not names:
+            messagebox.showwarning("No Selection", "Please select a wheel.", parent=self.top)
             return
 
-        self.selected = self.listbox.get(selection[0])
+        self.selected = names[0]
         self.top.destroy()
 
     def cancel(self):
@@ -628,8 +2266,50 @@ class WheelSelector:
         self.top.destroy()
 
 
+def report_startup_time(root):
+    """Print how long it took until the manager window was drawn, then exit"""
+    root.update()
+    print(json.dumps({
+        "startup_s": time.perf_counter() - STARTUP_BEGIN,
+        "modules": sorted(name for name in ("PIL", "pygame", "numpy") if name in sys.modules),
+    }))
+    root.destroy()
+
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spin the Wheel")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="Print how long the manager window took to appear and exit")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record metrics and write them to PATH (Prometheus text, or JSON for .json)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, metavar="SECONDS")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="Also serve spins over HTTP/WebSocket on PORT (see wheelserver.py)")
+    parser.add_argument("--serve-host", default="127.0.0.1", metavar="HOST")
+    parser.add_argument("--mirror", action="store_true",
+                        help="Animate spins made through the service in open wheel windows")
+    parser.add_argument("--trace-memory", type=int, nargs="?", const=1, metavar="FRAMES",
+                        help="Trace allocations with tracemalloc from startup, for Diagnostics")
+    args = parser.parse_args()
+
+    if args.trace_memory:
+        import tracemalloc
+        tracemalloc.start(args.trace_memory)
+
+    if args.metrics:
+        METRICS.start_writer(args.metrics, args.metrics_interval)
+
     # Create main window
     root = tk.Tk()
     app = WheelManager(root)
+    if args.serve:
+        app.start_service(args.serve_host, args.serve, args.mirror)
+    if args.startup_time:
+        root.after_idle(report_startup_time, root)
     root.mainloop()
+    if app.service is not None:
+        app.service.stop()
+    HISTORY.close()
+    METRICS.stop_writer()
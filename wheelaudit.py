@@ -0,0 +1,230 @@
+"""Monte Carlo fairness audit of a wheel.
+
+Simulates many spins, spread across worker processes with independent
+seeded random streams, and compares the outcome frequencies with the
+configured sizes. Two selection paths can be audited:
+
+    outcome  the GUI's spins: WheelEngine.outcome() draws the winner from a
+             per-spin seed, and every landing rotation is also checked to
+             stop the pointer inside the drawn sector (the default)
+    free     free spins: spin_degrees() gives the landing rotation and
+             WheelEngine.winner_index() reads the winner off it, as history
+             replays of source "spin" do
+
+    python wheelaudit.py NAME --spins 10000000 --seed 42 [--mode free]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from wheelengine import LANDING_MODES, WheelEngine, spin_degrees
+from wheelstore import get_store
+
+
+AUDIT_MODES = ("outcome", "free")
+
+
+def simulate(items_with_sizes, mode, landing, seed, chunk, spins):
+    """Simulate spins with the stream of (seed, chunk).
+
+    Returns each item's wins and, for outcome spins, how many landing
+    rotations stopped the pointer outside the drawn item.
+    """
+    engine = WheelEngine(items_with_sizes)
+    # String seeds are hashed with SHA-512, so each chunk gets an independent stream
+    rng = random.Random(f"{seed}:{chunk}")
+    counts = [0] * len(engine)
+    misplaced = 0
+    winner_index = engine.winner_index
+    if mode == "outcome":
+        outcome = engine.outcome
+        getrandbits = rng.getrandbits
+        for _ in range(spins):
+            spin = outcome(getrandbits(64))
+            counts[spin.index] += 1
+            if winner_index(spin.rotation) != spin.index:
+                misplaced += 1
+    else:
+        for _ in range(spins):
+            counts[winner_index(spin_degrees(rng, landing) % 360)] += 1
+    return counts, misplaced
+
+
+def chi_square_p_value(statistic, dof):
+    """Return P(X >= statistic) for a chi-square distribution with dof degrees of freedom"""
+    if dof <= 0:
+        return 1.0
+    return upper_incomplete_gamma(dof / 2, statistic / 2)
+
+
+def upper_incomplete_gamma(a, x):
+    """Regularized upper incomplete gamma function Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series for P(a, x)
+        term = total = 1 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+
+    # Continued fraction for Q(a, x) (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def degree_landing_shares(items_with_sizes):
+    """Return each item's exact win share when landing on whole degrees"""
+    engine = WheelEngine(items_with_sizes)
+    shares = [0.0] * len(engine)
+    for angle in range(360):
+        shares[engine.winner_index(angle)] += 1 / 360
+    return shares
+
+
+def audit(items_with_sizes, spins, seed=0, landing="continuous", workers=None, chunks=None,
+          alpha=0.01, mode="outcome"):
+    """Run the audit and return a report dict; landing only applies to free spins"""
+    if spins < 1:
+        raise ValueError("An audit needs at least 1 spin.")
+    if mode not in AUDIT_MODES:
+        raise ValueError(f"Unknown audit mode '{mode}', expected one of {', '.join(AUDIT_MODES)}.")
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers * 4
+    chunk_spins = [spins // chunks + (1 if i < spins % chunks else 0) for i in range(chunks)]
+
+    started = time.perf_counter()
+    counts = [0] * len(items_with_sizes)
+    misplaced = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(simulate, items_with_sizes, mode, landing, seed, chunk, n)
+                   for chunk, n in enumerate(chunk_spins) if n]
+        for future in futures:
+            chunk_counts, chunk_misplaced = future.result()
+            misplaced += chunk_misplaced
+            for i, count in enumerate(chunk_counts):
+                counts[i] += count
+    elapsed = time.perf_counter() - started
+
+    total = sum(size for _, size in items_with_sizes)
+    statistic = 0.0
+    rows = []
+    for (item, size), observed in zip(items_with_sizes, counts):
+        p = size / total
+        expected = spins * p
+        statistic += (observed - expected) ** 2 / expected
+        sd = math.sqrt(spins * p * (1 - p)) or 1.0
+        rows.append({
+            "item": item,
+            "size": size,
+            "expected_share": p,
+            "observed_share": observed / spins,
+            "observed": observed,
+            "expected": expected,
+            "relative_deviation": (observed - expected) / expected,
+            "z": (observed - expected) / sd,
+        })
+    if mode == "free" and landing == "degree":
+        for row, share in zip(rows, degree_landing_shares(items_with_sizes)):
+            row["landing_share"] = share
+
+    dof = len(items_with_sizes) - 1
+    p_value = chi_square_p_value(statistic, dof)
+    return {
+        "spins": spins,
+        "seed": seed,
+        "mode": mode,
+        "landing": landing if mode == "free" else None,
+        "workers": workers,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "spins_per_second": spins / elapsed if elapsed else None,
+        "chi_square": statistic,
+        "degrees_of_freedom": dof,
+        "p_value": p_value,
+        "alpha": alpha,
+        "misplaced_landings": misplaced,
+        "passed": p_value >= alpha and not misplaced,
+        "items": rows,
+    }
+
+
+def print_report(report, file=sys.stdout):
+    landing = "" if report["landing"] is None else f"landing={report['landing']}, "
+    print(f"{report['spins']:,} {report['mode']} spins, {landing}seed={report['seed']}, "
+          f"{report['workers']} workers, {report['spins_per_second']:,.0f} spins/s", file=file)
+    print(f"{'item':30} {'expected':>10} {'observed':>10} {'deviation':>10} {'z':>8}", file=file)
+    for row in report["items"]:
+        print(f"{str(row['item'])[:30]:30} {row['expected_share']:10.6f} {row['observed_share']:10.6f} "
+              f"{row['relative_deviation']:+10.4%} {row['z']:+8.2f}", file=file)
+    verdict = "PASS" if report["passed"] else "FAIL"
+    print(f"chi-square {report['chi_square']:.3f} with {report['degrees_of_freedom']} degrees of "
+          f"freedom, p = {report['p_value']:.4g} at alpha {report['alpha']}", file=file)
+    if report["mode"] == "outcome":
+        print(f"{report['misplaced_landings']:,} landings outside the drawn item", file=file)
+    print(verdict, file=file)
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit a wheel's outcome frequencies")
+    parser.add_argument("name", help="Saved wheel to audit")
+    parser.add_argument("--spins", type=positive_int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=AUDIT_MODES, default="outcome",
+                        help="outcome: the GUI's seeded spins; free: spin_degrees() free spins")
+    parser.add_argument("--landing", choices=LANDING_MODES, default="continuous",
+                        help="Landing of free spins")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    items = get_store().load_wheel(args.name)
+    if items is None:
+        parser.exit(2, f"No wheel named '{args.name}'.\n")
+
+    report = audit(items, args.spins, args.seed, args.landing, args.workers, alpha=args.alpha,
+                   mode=args.mode)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
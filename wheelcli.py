@@ -0,0 +1,255 @@
+"""Headless command line for Spin the Wheel.
+
+    python spinwheel.py spin NAME [--count N] [--seed S] [--format jsonl] [--free]
+    python spinwheel.py plan NAME [--count N] [--seed S] [--output PATH]
+    python spinwheel.py replay NAME SEED [--free]
+    python spinwheel.py animate NAME spin.gif [--seed S] [--fps 30] [--size 500]
+    python spinwheel.py list [--prefix P] [--long]
+    python spinwheel.py show NAME [--format text]
+    python spinwheel.py import PATH NAME [--format csv]
+    python spinwheel.py export NAME PATH [--format csv]
+
+spinwheel.py hands these subcommands over before it imports tkinter, and
+nothing here imports tkinter or pygame (animate imports PIL when it runs),
+so they run on machines without a display. Spins and listings are streamed
+to stdout as they are produced, so memory stays constant however many are
+asked for.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+
+from wheelengine import LANDING_MODES, WheelEngine
+from wheelexport import add_arguments as add_export_arguments, export_from_args, summary
+from wheelio import FORMATS, export_wheel, import_wheel, write_items, write_plan
+from wheelstore import get_store
+
+COMMANDS = ("spin", "plan", "replay", "animate", "list", "show", "import", "export")
+SPIN_FORMATS = ("jsonl", "csv", "text")
+LIST_PAGE = 1000
+FLUSH_EVERY = 1000  # Lines written and flushed at a time when streaming
+
+
+def load_items(name):
+    items = get_store().load_wheel(name)
+    if items is None:
+        sys.exit(f"No wheel named '{name}'.")
+    return items
+
+
+def spins(engine, count, seed, landing=None):
+    """Yield (spin number, SpinOutcome) for count spins, each decided by its own seed.
+
+    Like the GUI, a spin is outcome-first, or a free spin with landing when
+    given. The per-spin seeds come from seed, so they can be replayed.
+    """
+    rng = random.Random(seed)
+    if landing is None:
+        def decide(spin_seed):
+            return engine.outcome(spin_seed)
+    else:
+        def decide(spin_seed):
+            return engine.free_spin(spin_seed, landing)
+    for number in range(1, count + 1):
+        yield number, decide(rng.getrandbits(64))
+
+
+def spin(args):
+    """Spin a wheel and write one result per line"""
+    engine = WheelEngine(load_items(args.name))
+    items = engine.items
+    out = sys.stdout
+    history = None
+    if args.record:
+        from wheelhistory import HISTORY, SOURCE_OUTCOME, SOURCE_SPIN
+        history = HISTORY
+        source = SOURCE_SPIN if args.free else SOURCE_OUTCOME
+
+    if args.format == "jsonl":
+        names = [json.dumps(item) for item in items]  # Encoded once, not once per spin
+
+        def line(number, spin):
+            return (f'{{"spin": {number}, "item": {names[spin.index]}, "index": {spin.index}, '
+                    f'"rotation": {spin.rotation:.6f}, "seed": {spin.seed}}}\n')
+    elif args.format == "csv":
+        out.write("spin,item,index,rotation,seed\n")
+        names = []
+        for item in items:
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="").writerow([item])
+            names.append(buffer.getvalue())
+
+        def line(number, spin):
+            return f"{number},{names[spin.index]},{spin.index},{spin.rotation:.6f},{spin.seed}\n"
+    else:
+        def line(number, spin):
+            return f"{items[spin.index]}\n"
+
+    batch = []
+    for number, spin in spins(engine, args.count, args.seed, args.landing if args.free else None):
+        batch.append(line(number, spin))
+        if history is not None:
+            history.record(args.name, items[spin.index], spin.index, spin.rotation, spin.seed, source,
+                           landing=args.landing)
+        if len(batch) == FLUSH_EVERY:
+            out.writelines(batch)
+            out.flush()
+            batch = []
+    out.writelines(batch)
+    if history is not None:
+        history.close()
+
+
+def plan(args):
+    """Precompute outcome-first spins for the GUI's Load Plan, one JSON object per line"""
+    engine = WheelEngine(load_items(args.name))
+    items = engine.items
+    rng = random.Random(args.seed)
+    entries = (engine.outcome(rng.getrandbits(64)).to_dict(items) for _ in range(args.count))
+    if args.output == "-":
+        for entry in entries:
+            sys.stdout.write(json.dumps(entry) + "\n")
+    else:
+        write_plan(args.output, entries)
+        print(f"Planned {args.count} spins in {args.output}.", file=sys.stderr)
+
+
+def replay(args):
+    """Write the outcome of the recorded spin with the given seed"""
+    engine = WheelEngine(load_items(args.name))
+    if args.free:
+        outcome = engine.free_spin(args.seed, args.landing)
+    else:
+        outcome = engine.outcome(args.seed)
+    print(json.dumps(outcome.to_dict(engine.items)))
+
+
+def animate(args):
+    """Render a spin to an animated GIF/WebP or PNG sequence, off-screen"""
+    print(summary(export_from_args(load_items(args.name), args)), file=sys.stderr)
+
+
+def list_command(args):
+    """Write wheel names, or one JSON summary per line with --long, a page at a time"""
+    store = get_store()
+    offset = args.offset
+    remaining = args.limit
+    while remaining is None or remaining > 0:
+        page = LIST_PAGE if remaining is None else min(LIST_PAGE, remaining)
+        if args.long:
+            rows = [json.dumps(info) for info in store.list_wheel_info(args.prefix, offset, page)]
+        else:
+            rows = store.list_wheels(args.prefix, offset, page)
+        if rows:
+            sys.stdout.write("\n".join(rows) + "\n")
+        if len(rows) < page:
+            break
+        offset += page
+        if remaining is not None:
+            remaining -= page
+
+
+def show(args):
+    """Write a wheel's items"""
+    write_items(load_items(args.name), sys.stdout, args.format)
+
+
+def import_command(args):
+    result = import_wheel(args.path, args.name, args.format)
+    if result.errors:
+        print(result.error_report(limit=len(result.errors)), file=sys.stderr)
+    if not result.items:
+        return 1
+    print(f"Imported {len(result.items)} items into '{args.name}'.", file=sys.stderr)
+    return 0
+
+
+def export_command(args):
+    items = load_items(args.name)
+    if args.path == "-":
+        write_items(items, sys.stdout, args.format or "text")
+    else:
+        export_wheel(items, args.path, args.format)
+        print(f"Exported {len(items)} items to {args.path}.", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="spinwheel.py", description="Spin the Wheel without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    spin_parser = commands.add_parser("spin", help="Spin a saved wheel")
+    spin_parser.add_argument("name")
+    spin_parser.add_argument("--count", type=int, default=1)
+    spin_parser.add_argument("--seed", type=int, help="Seed for reproducible results")
+    spin_parser.add_argument("--format", choices=SPIN_FORMATS, default="jsonl")
+    spin_parser.add_argument("--free", action="store_true",
+                             help="Free spins, the winner read off where they stop, instead of outcome-first")
+    spin_parser.add_argument("--landing", choices=LANDING_MODES, default="continuous",
+                             help="Landing of free spins")
+    spin_parser.add_argument("--record", action="store_true", help="Also record the spins in the spin history")
+    spin_parser.set_defaults(run=spin)
+
+    plan_parser = commands.add_parser("plan", help="Precompute spins ahead of a live event")
+    plan_parser.add_argument("name")
+    plan_parser.add_argument("--count", type=int, default=1)
+    plan_parser.add_argument("--seed", type=int, help="Seed the per-spin seeds are drawn from")
+    plan_parser.add_argument("--output", default="-", help="Plan file, or - for stdout")
+    plan_parser.set_defaults(run=plan)
+
+    replay_parser = commands.add_parser("replay", help="Show the outcome of a recorded spin's seed")
+    replay_parser.add_argument("name")
+    replay_parser.add_argument("seed", type=int)
+    replay_parser.add_argument("--free", action="store_true",
+                               help="The spin was a free spin (history source 'spin')")
+    replay_parser.add_argument("--landing", choices=LANDING_MODES, default="continuous")
+    replay_parser.set_defaults(run=replay)
+
+    animate_parser = commands.add_parser("animate", help="Export a spin animation without a display")
+    animate_parser.add_argument("name")
+    animate_parser.add_argument("path", help="spin.gif, spin.webp, or spin.png for spin-00001.png, ...")
+    add_export_arguments(animate_parser)
+    animate_parser.set_defaults(run=animate)
+
+    list_parser = commands.add_parser("list", help="List saved wheels")
+    list_parser.add_argument("--prefix", default="")
+    list_parser.add_argument("--offset", type=int, default=0)
+    list_parser.add_argument("--limit", type=int)
+    list_parser.add_argument("--long", action="store_true",
+                             help="One JSON line with item count, total and modified time per wheel")
+    list_parser.set_defaults(run=list_command)
+
+    show_parser = commands.add_parser("show", help="Write a wheel's items")
+    show_parser.add_argument("name")
+    show_parser.add_argument("--format", choices=FORMATS, default="text")
+    show_parser.set_defaults(run=show)
+
+    import_parser = commands.add_parser("import", help="Create a wheel from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("name")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.set_defaults(run=import_command)
+
+    export_parser = commands.add_parser("export", help="Write a wheel's items to a file, or - for stdout")
+    export_parser.add_argument("name")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+    export_parser.set_defaults(run=export_command)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "count", 1) < 0:
+        parser.error("--count can't be negative")
+    try:
+        return args.run(args) or 0
+    except BrokenPipeError:
+        # Output piped into head and friends; stop quietly, also at interpreter exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""Headless winner selection for Spin the Wheel.
+
+WheelEngine works on the same [(item, size), ...] data that load_wheel()
+returns, or on a Wheel, and has no dependency on Tk, so it can be used both
+by the GUI and for bulk draws (raffles, A/B assignment, simulations).
+"""
+import bisect
+import math
+import random
+from array import array
+from collections import Counter
+
+from wheelmodel import as_wheel
+
+POINTER_ANGLE = 90  # The pointer sits at 12 o'clock
+SPIN_SECONDS = 4.0  # How long the spin animation runs
+
+# "degree" lands on one of 360 whole-degree angles, which skews sizes that
+# don't divide 360 evenly. "continuous" lands anywhere on the wheel.
+LANDING_MODES = ("degree", "continuous")
+
+SEED_BITS = 64  # Recorded seeds are unsigned 64-bit, seed 0 meaning none
+
+np = None
+numpy_loaded = False
+
+
+def load_numpy():
+    """Import NumPy on first use, so importing this module stays cheap"""
+    global np, numpy_loaded
+    if not numpy_loaded:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # NumPy is optional, draws fall back to the stdlib
+            np = None
+        numpy_loaded = True
+    return np
+
+
+def spin_degrees(rng, landing="continuous"):
+    """Return how far one spin turns the wheel: 5-8 full turns plus the landing angle"""
+    spins = rng.randint(5, 8)  # Number of full rotations
+    if landing == "degree":
+        return spins * 360 + rng.randint(0, 359)
+    return spins * 360 + rng.random() * 360
+
+
+def is_spin_seed(seed):
+    """Return whether seed can be recorded to replay a spin: an int with 0 < seed < 2**64"""
+    return isinstance(seed, int) and not isinstance(seed, bool) and 0 < seed < 1 << SEED_BITS
+
+
+def ease_out_quad(t):
+    """Easing of the spin animation: fast at first, slowing to a stop at t = 1"""
+    return t * (2 - t)
+
+
+def spin_rotations(total_degrees, fps, duration=SPIN_SECONDS):
+    """Return the wheel rotation of every frame of a spin, from 0 to where it stops"""
+    frames = max(1, int(round(duration * fps)))
+    return [ease_out_quad(i / frames) * total_degrees % 360 for i in range(frames + 1)]
+
+
+class SpinOutcome:
+    """A spin decided before it is animated: the winner and where the wheel stops"""
+    __slots__ = ("seed", "index", "rotation", "turns")
+
+    def __init__(self, seed, index, rotation, turns):
+        self.seed = seed
+        self.index = index
+        self.rotation = rotation  # Final wheel rotation in [0, 360)
+        self.turns = turns  # Full turns before it
+
+    def __repr__(self):
+        return f"SpinOutcome(seed={self.seed}, index={self.index}, rotation={self.rotation:.6f})"
+
+    @property
+    def total_degrees(self):
+        """How far the animation turns the wheel"""
+        return self.turns * 360 + self.rotation
+
+    def to_dict(self, items):
+        return {"seed": self.seed, "index": self.index, "item": items[self.index],
+                "rotation": self.rotation, "turns": self.turns}
+
+
+class WheelEngine:
+    """Weighted sampler over a wheel's items"""
+    def __init__(self, items_with_sizes, seed=None):
+        if not items_with_sizes:
+            raise ValueError("A wheel needs at least one item.")
+
+        # The labels and size arrays are shared with the Wheel, not copied
+        self.wheel = as_wheel(items_with_sizes)
+        self.items = self.wheel.labels
+        self.sizes = self.wheel.sizes
+        if any(size <= 0 for size in self.sizes):
+            raise ValueError("Item sizes must be positive.")
+
+        self.total = self.wheel.total
+        self.cumulative = self.wheel.cumulative
+        self.prob = None  # The alias table is built on the first draw
+        self.seed(seed)
+
+    def __len__(self):
+        return len(self.items)
+
+    def seed(self, seed=None):
+        """Reseed the random streams used by draw() and draw_many()"""
+        self.rng = random.Random(seed)
+        self.np_seed = seed
+        self.numpy_rng = None
+
+    @property
+    def np_rng(self):
+        """NumPy's random stream, or None without NumPy. NumPy is imported on first use"""
+        if self.numpy_rng is None and load_numpy() is not None:
+            self.numpy_rng = np.random.default_rng(self.np_seed)
+        return self.numpy_rng
+
+    def set_sizes(self, changes):
+        """Change item sizes in place from {index: size}, see Wheel.set_sizes().
+
+        The alias table is rebuilt on the next draw.
+        """
+        if any(not 0 < size < math.inf for size in changes.values()):
+            raise ValueError("Item sizes must be positive.")
+        first = self.wheel.set_sizes(changes)
+        self.sizes = self.wheel.sizes
+        self.cumulative = self.wheel.cumulative
+        self.total = self.wheel.total
+        self.prob = None
+        return first
+
+    def build_alias_table(self):
+        """Precompute Vose's alias table for O(1) draws"""
+        if self.prob is not None:
+            return
+        n = len(self.sizes)
+        scaled = [size * n / self.total for size in self.sizes]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        prob = [1.0] * n
+        alias = list(range(n))
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1
+            if scaled[l] < 1:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # Whatever is left over is 1 up to rounding error
+        self.prob = array("d", prob)
+        self.alias = array("q", alias)
+        if load_numpy() is not None:
+            self.np_prob = np.array(prob, dtype=np.float64)
+            self.np_alias = np.array(alias, dtype=np.int64)
+
+    def index_at(self, position):
+        """Return the index of the item covering position in [0, total)"""
+        index = bisect.bisect_right(self.cumulative, position)
+        return min(index, len(self.items) - 1)
+
+    def index_at_angle(self, angle):
+        """Return the index of the item under the given wheel angle in degrees"""
+        return self.index_at((angle % 360) * self.total / 360)
+
+    def item_at_angle(self, angle):
+        """Return the item under the given wheel angle in degrees"""
+        return self.items[self.index_at_angle(angle)]
+
+    def winner_index(self, rotation):
+        """Return the index of the item under the pointer when the wheel is at rotation"""
+        return self.index_at_angle(POINTER_ANGLE - rotation)
+
+    # ===========================
+    # Outcome-first spins
+    # ===========================
+    def landing_rotation(self, index, fraction):
+        """Return the rotation that stops the pointer at fraction of the way through item index"""
+        size = self.sizes[index]
+        start = self.cumulative[index] - size
+        rotation = (POINTER_ANGLE - (start + fraction * size) * 360 / self.total) % 360
+        if self.winner_index(rotation) != index:
+            # Rounded onto the neighbouring sector at an edge, aim for the middle instead
+            rotation = (POINTER_ANGLE - (start + size / 2) * 360 / self.total) % 360
+        return rotation
+
+    def outcome(self, seed):
+        """Decide a spin from seed alone: winner first, then where in its sector it stops.
+
+        One uniform position on [0, total) picks the winner with probability
+        size / total and is uniform inside the winner's sector, so the same
+        seed gives the same spin on any machine for the same wheel.
+        """
+        rng = random.Random(seed)
+        position = rng.random() * self.total
+        index = self.index_at(position)
+        size = self.sizes[index]
+        fraction = (position - (self.cumulative[index] - size)) / size
+        return SpinOutcome(seed, index, self.landing_rotation(index, min(fraction, 1.0)),
+                           rng.randint(5, 8))
+
+    def free_spin(self, seed, landing="continuous"):
+        """Replay a spin_degrees() spin from its seed, the winner read off where it stopped"""
+        degrees = spin_degrees(random.Random(seed), landing)
+        rotation = degrees % 360
+        return SpinOutcome(seed, self.winner_index(rotation), rotation, int(degrees // 360))
+
+    def plan(self, count, seed=None):
+        """Precompute count outcomes, each with its own seed drawn from seed"""
+        rng = random.Random(seed)
+        return [self.outcome(rng.getrandbits(64)) for _ in range(count)]
+
+    def draw_index(self):
+        """Draw one item index"""
+        if self.prob is None:
+            self.build_alias_table()
+        i = self.rng.randrange(len(self.prob))
+        if self.rng.random() < self.prob[i]:
+            return i
+        return self.alias[i]
+
+    def draw(self):
+        """Draw one item"""
+        return self.items[self.draw_index()]
+
+    def draw_indices(self, n):
+        """Draw n item indices (a NumPy array when NumPy is available)"""
+        if load_numpy() is not None:
+            self.build_alias_table()
+            columns = self.np_rng.integers(0, len(self.prob), size=n)
+            coins = self.np_rng.random(n)
+            return np.where(coins < self.np_prob[columns], columns, self.np_alias[columns])
+        return self.rng.choices(range(len(self.items)), cum_weights=self.cumulative, k=n)
+
+    def draw_many(self, n):
+        """Draw n items"""
+        if load_numpy() is not None:
+            items = self.items
+            return [items[i] for i in self.draw_indices(n).tolist()]
+        return self.rng.choices(self.items, cum_weights=self.cumulative, k=n)
+
+    def counts(self, n):
+        """Draw n items and return how often each item was drawn"""
+        if load_numpy() is not None:
+            index_counts = np.bincount(self.draw_indices(n), minlength=len(self.items)).tolist()
+        else:
+            tally = Counter(self.draw_indices(n))
+            index_counts = [tally[i] for i in range(len(self.items))]
+
+        result = {}
+        for item, count in zip(self.items, index_counts):
+            result[item] = result.get(item, 0) + count
+        return result
+
+
+class FenwickTree:
+    """Prefix sums over weights with O(log n) updates and searches"""
+    def __init__(self, weights):
+        n = len(weights)
+        tree = [0] + list(weights)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self.tree = tree
+        self.size = n
+        self.top = 1 << (n.bit_length() - 1) if n else 0
+
+    def add(self, index, delta):
+        """Add delta to the weight at index"""
+        i = index + 1
+        tree = self.tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Return the sum of the weights before index"""
+        total = 0
+        tree = self.tree
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+    def total(self):
+        return self.prefix(self.size)
+
+    def find(self, position):
+        """Return the index whose cumulative range contains position in [0, total)"""
+        index = 0
+        step = self.top
+        tree = self.tree
+        while step:
+            candidate = index + step
+            if candidate <= self.size and tree[candidate] <= position:
+                position -= tree[candidate]
+                index = candidate
+            step >>= 1
+        return index
+
+
+class EliminationDraw:
+    """Draws items without replacement, each draw weighted by the remaining sizes.
+
+    Removed items are kept in a Fenwick tree at weight zero, so each
+    draw-and-remove is O(log n).
+    """
+    def __init__(self, items_with_sizes, seed=None):
+        wheel = as_wheel(items_with_sizes)
+        self.items = wheel.labels
+        self.sizes = list(wheel.sizes)
+        if any(size <= 0 for size in self.sizes):
+            raise ValueError("Item sizes must be positive.")
+        self.tree = FenwickTree(self.sizes)
+        self.removed = bytearray(len(self.items))
+        self.remaining = len(self.items)
+        self.rng = random.Random(seed)
+
+    def __len__(self):
+        return self.remaining
+
+    def remove(self, index):
+        """Take an item out of the remaining draws"""
+        if not self.removed[index]:
+            self.tree.add(index, -self.sizes[index])
+            self.removed[index] = 1
+            self.remaining -= 1
+
+    def set_size(self, index, size):
+        """Change an item's size, for the draws after this one"""
+        if not self.removed[index]:
+            self.tree.add(index, size - self.sizes[index])
+        self.sizes[index] = size
+
+    def rebuild(self):
+        """Recompute the tree from scratch, dropping float rounding error"""
+        self.tree = FenwickTree([0 if removed else size
+                                 for size, removed in zip(self.sizes, self.removed)])
+
+    def pick(self):
+        """Return (index, position) of a weighted draw among the remaining items"""
+        if not self.remaining:
+            raise IndexError("All items have been drawn.")
+        position = self.rng.random() * self.tree.total()
+        index = self.tree.find(position)
+        if index >= len(self.items) or self.removed[index]:
+            # Only reachable through float rounding with fractional sizes
+            self.rebuild()
+            position = self.rng.random() * self.tree.total()
+            index = self.tree.find(position)
+        return index, position
+
+    def draw_position(self):
+        """Draw and remove one item.
+
+        Returns (index, fraction) where fraction in [0, 1) is how far into
+        the item's size the draw landed, so callers can place the pointer
+        inside the winning sector.
+        """
+        index, position = self.pick()
+        fraction = (position - self.tree.prefix(index)) / self.sizes[index]
+        self.remove(index)
+        return index, min(max(fraction, 0.0), 1.0 - 1e-12)
+
+    def draw_index(self):
+        """Draw and remove one item index"""
+        index = self.pick()[0]
+        self.remove(index)
+        return index
+
+    def draw(self):
+        """Draw and remove one item"""
+        return self.items[self.draw_index()]
+
+    def draw_order_indices(self):
+        """Draw every remaining item index, first winner first.
+
+        Each item gets an exponential clock with rate equal to its size and
+        items are ranked by when their clock rings, which gives the same
+        distribution as calling draw_index() until empty in O(n log n).
+        """
+        live = [i for i, removed in enumerate(self.removed) if not removed]
+        if load_numpy() is not None:
+            np_rng = np.random.default_rng(self.rng.getrandbits(64))
+            sizes = np.array([self.sizes[i] for i in live], dtype=np.float64)
+            order = np.argsort(np_rng.exponential(size=len(live)) / sizes, kind="stable")
+            ranked = [live[i] for i in order.tolist()]
+        else:
+            expovariate = self.rng.expovariate
+            sizes = self.sizes
+            ranked = sorted(live, key=lambda i: expovariate(1) / sizes[i])
+
+        for index in ranked:
+            self.removed[index] = 1
+        self.remaining = 0
+        self.tree = FenwickTree([0] * len(self.items))
+        return ranked
+
+    def draw_order(self):
+        """Draw every remaining item, first winner first"""
+        items = self.items
+        return [items[i] for i in self.draw_order_indices()]
@@ -0,0 +1,224 @@
+"""Off-screen export of spin animations.
+
+Renders the spin a window would show, with Pillow and without a display:
+the outcome comes from WheelEngine.outcome() and the motion from
+spin_rotations(), the same easing curve SpinTheWheel animates. Frames are
+rendered by a pool of worker processes, each of which rasterizes the wheel
+once, and are then encoded as
+
+    gif    animated GIF, each frame quantized in the worker
+    webp   animated WebP
+    png    one PNG file per frame, written by the workers
+
+    python wheelexport.py NAME spin.gif [--seed S] [--fps 30] [--size 500]
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from wheelengine import SPIN_SECONDS, WheelEngine, spin_rotations
+from wheelmodel import WHEEL_COLORS, as_wheel
+
+EXPORT_FORMATS = ("gif", "webp", "png")
+EXTENSIONS = {".gif": "gif", ".webp": "webp", ".png": "png"}
+CANVAS_SIZE = 500  # Size of the SpinTheWheel canvas the scene is laid out on
+CHUNK_FRAMES = 8  # Frames handed to a worker at a time
+
+# Set up in each worker by init_worker()
+SCENE = None
+
+
+def detect_format(path):
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Can't tell the format of '{path}', use one of {', '.join(EXPORT_FORMATS)}.")
+    return fmt
+
+
+def frame_path(path, number):
+    """Return the file name of one frame of a PNG sequence, e.g. spin-00001.png"""
+    base, ext = os.path.splitext(path)
+    return f"{base}-{number:05d}{ext or '.png'}"
+
+
+class SpinScene:
+    """The canvas of a SpinTheWheel window, drawn with Pillow at any size"""
+    def __init__(self, items_with_sizes, colors, size=CANVAS_SIZE, step=0.25):
+        from PIL import Image, ImageDraw
+
+        from wheelrender import PillowWheelRenderer
+
+        self.size = size
+        scale = size / CANVAS_SIZE
+
+        def box(*coords):
+            return [c * scale for c in coords]
+
+        # Every frame is rendered once, so they skip the shared frame cache
+        self.renderer = PillowWheelRenderer(items_with_sizes, colors, radius=int(200 * scale), step=step)
+        self.renderer.base_image()
+        self.wheel_offset = int(size / 2 - self.renderer.size / 2)
+
+        # What doesn't turn is drawn once: the shadow below the wheel, the hub and pointer above it
+        self.background = Image.new("RGBA", (size, size), "white")
+        ImageDraw.Draw(self.background).ellipse(box(54, 54, 454, 454), fill="#888888")
+        self.overlay = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(self.overlay)
+        width = max(1, round(2 * scale))
+        draw.ellipse(box(230, 230, 270, 270), fill="#2c3e50", outline="white", width=width)
+        draw.polygon(box(240, 20, 260, 20, 250, 0), fill="#e74c3c", outline="black", width=width)
+        draw.rectangle(box(245, 20, 255, 40), fill="#7f8c8d", outline="black",
+                       width=max(1, round(scale)))
+
+    def render(self, rotation):
+        """Return the scene with the wheel turned by rotation degrees, as an RGB image"""
+        frame = self.background.copy()
+        wheel = self.renderer.render_frame(self.renderer.angle_index(rotation))
+        frame.alpha_composite(wheel, (self.wheel_offset, self.wheel_offset))
+        frame.alpha_composite(self.overlay)
+        return frame.convert("RGB")
+
+
+def init_worker(items, colors, size, step):
+    global SCENE
+    SCENE = SpinScene(items, colors, size, step)
+
+
+def render_chunk(frames, fmt, colors, path):
+    """Render (number, rotation) frames and return them ready for the encoder.
+
+    GIF frames are quantized here, where it runs in parallel, and PNG frames
+    are written straight to their files.
+    """
+    results = []
+    for number, rotation in frames:
+        image = SCENE.render(rotation)
+        if fmt == "gif":
+            image = image.quantize(colors, method=2)  # Fast octree, by number for Pillow 9.0
+            results.append((number, image.mode, image.size, image.tobytes(), image.getpalette()))
+        elif fmt == "png":
+            name = frame_path(path, number)
+            image.save(name, compress_level=1)
+            results.append((number, name))
+        else:
+            results.append((number, image.mode, image.size, image.tobytes(), None))
+    return results
+
+
+def export_spin(items_with_sizes, path, seed=None, outcome=None, fmt=None, fps=30, size=CANVAS_SIZE,
+                quality=80, colors=256, hold=1.5, workers=None, palette=WHEEL_COLORS, step=0.25):
+    """Render a whole spin off-screen and encode it, returning throughput stats.
+
+    The spin is outcome (a SpinOutcome), or the outcome-first spin of seed.
+    quality is WebP's 0-100 (100 is lossless), colors the GIF palette size
+    and hold how long the last frame stays up, in seconds. workers=1 renders
+    in this process.
+    """
+    from PIL import Image
+
+    fmt = fmt or detect_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}.")
+    wheel = as_wheel(items_with_sizes)
+    engine = WheelEngine(wheel)
+    if outcome is None:
+        outcome = engine.outcome(seed if seed is not None else engine.rng.getrandbits(64))
+    rotations = spin_rotations(outcome.total_degrees, fps, SPIN_SECONDS)
+    frames = list(enumerate(rotations, 1))
+    chunks = [frames[i:i + CHUNK_FRAMES] for i in range(0, len(frames), CHUNK_FRAMES)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    start = time.perf_counter()
+    if workers <= 1:
+        init_worker(wheel, palette, size, step)
+        results = [render_chunk(chunk, fmt, colors, path) for chunk in chunks]
+    else:
+        # Spawned rather than forked, so exporting from the Tk app doesn't copy its state
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_worker,
+                                 initargs=(wheel, palette, size, step)) as pool:
+            results = list(pool.map(render_chunk, chunks, [fmt] * len(chunks),
+                                    [colors] * len(chunks), [path] * len(chunks)))
+    render_seconds = time.perf_counter() - start
+    results = [frame for chunk in results for frame in chunk]
+
+    start = time.perf_counter()
+    if fmt == "png":
+        paths = [name for _, name in results]
+        nbytes = sum(os.path.getsize(name) for name in paths)
+    else:
+        images = []
+        for _, mode, image_size, data, image_palette in results:
+            image = Image.frombytes(mode, image_size, data)
+            if image_palette is not None:
+                image.putpalette(image_palette)
+            images.append(image)
+        frame_ms = 1000 / fps
+        durations = [frame_ms] * (len(images) - 1) + [max(frame_ms, hold * 1000)]
+        if fmt == "gif":
+            images[0].save(path, save_all=True, append_images=images[1:], duration=durations,
+                           loop=0, optimize=False)
+        else:
+            images[0].save(path, save_all=True, append_images=images[1:], duration=durations,
+                           loop=0, quality=quality, lossless=quality >= 100, method=4)
+        paths = [path]
+        nbytes = os.path.getsize(path)
+    encode_seconds = time.perf_counter() - start
+
+    return {
+        "format": fmt,
+        "paths": paths,
+        "frames": len(results),
+        "workers": workers,
+        "render_seconds": render_seconds,
+        "render_fps": len(results) / render_seconds if render_seconds else 0.0,
+        "encode_seconds": encode_seconds,
+        "fps": len(results) / (render_seconds + encode_seconds),
+        "bytes": nbytes,
+        "seed": outcome.seed,
+        "winner": wheel.labels[outcome.index],
+    }
+
+
+def add_arguments(parser):
+    """Add the export settings to an argparse parser"""
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Default: from the file extension")
+    parser.add_argument("--seed", type=int, help="Seed of the spin, e.g. one from the spin history")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--size", type=int, default=CANVAS_SIZE, help="Width and height in pixels")
+    parser.add_argument("--quality", type=int, default=80, help="WebP quality, 100 for lossless")
+    parser.add_argument("--colors", type=int, default=256, help="GIF palette size")
+    parser.add_argument("--hold", type=float, default=1.5, help="Seconds to show the result for")
+    parser.add_argument("--workers", type=int, help="Render processes, default one per CPU")
+
+
+def export_from_args(items, args):
+    return export_spin(items, args.path, seed=args.seed, fmt=args.format, fps=args.fps,
+                       size=args.size, quality=args.quality, colors=args.colors, hold=args.hold,
+                       workers=args.workers)
+
+
+def summary(stats):
+    where = stats["paths"][0] if len(stats["paths"]) == 1 else f"{len(stats['paths'])} files"
+    return (f"Exported {stats['frames']} frames to {where} ({stats['bytes'] / 1024:.0f} KiB): "
+            f"rendered at {stats['render_fps']:.0f} frames/s on {stats['workers']} workers, "
+            f"{stats['fps']:.0f} frames/s including encoding. Winner: {stats['winner']}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from wheelstore import get_store
+
+    parser = argparse.ArgumentParser(description="Export a spin animation of a saved wheel")
+    parser.add_argument("name")
+    parser.add_argument("path", help="spin.gif, spin.webp, or spin.png for spin-00001.png, ...")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    items = get_store().load_wheel(args.name)
+    if items is None:
+        sys.exit(f"No wheel named '{args.name}'.")
+    print(summary(export_from_args(items, args)))
@@ -0,0 +1,364 @@
+"""Append-only spin history.
+
+Every spin is stored as a fixed-width binary record in spin_history/:
+
+    spins-000001.bin   16 byte header, then 48 byte records:
+                       time (f8), seed (u8), rotation (f8), wheel key (u8),
+                       winner key (u8), winner index (u4), source (u4),
+                       with a free spin's landing mode above the low 8 bits
+    names.jsonl        {"key": ..., "name": ...} for every wheel and item key
+
+Wheel and item names are stored as 64-bit keys so records stay fixed
+width. record() only queues the record; a background thread appends
+batches, fsyncs at most once per fsync_interval and starts a new file once
+the current one reaches max_file_bytes. Queries memory-map the files and
+scan them, with NumPy when it is installed.
+"""
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+from wheelengine import is_spin_seed, load_numpy
+
+HISTORY_DIR = "spin_history"
+MAGIC = b"SPINLOG1"
+HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+RECORD = struct.Struct("<dQdQQII")
+NAMES_FILE = "names.jsonl"
+
+# Where a spin came from
+SOURCE_SPIN = 0
+SOURCE_ELIMINATION = 1
+SOURCE_SERVICE = 2
+SOURCE_OUTCOME = 3  # Winner drawn first from the seed, see WheelEngine.outcome()
+SOURCE_NAMES = {SOURCE_SPIN: "spin", SOURCE_ELIMINATION: "elimination", SOURCE_SERVICE: "service",
+                SOURCE_OUTCOME: "outcome"}
+# Sources whose seed alone reproduces the spin; service spins are outcome() spins
+REPLAYABLE_SOURCES = (SOURCE_SPIN, SOURCE_SERVICE, SOURCE_OUTCOME)
+
+# The landing mode of a free spin (SOURCE_SPIN) is stored above the source,
+# 0 being "continuous" so records made before it was stored read as that
+LANDING_SHIFT = 8
+LANDING_CODES = {"continuous": 0, "degree": 1}
+LANDING_NAMES = {code: landing for landing, code in LANDING_CODES.items()}
+
+FIELDS = ("time", "seed", "rotation", "wheel", "winner", "index", "source")
+
+
+def name_key(name):
+    """Return the 64-bit key a wheel or item name is stored under"""
+    digest = hashlib.blake2b(str(name).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def has_header(path):
+    """Return whether the file at path starts with the header of this record format"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    return len(header) == HEADER.size and HEADER.unpack(header)[:2] == (MAGIC, RECORD.size)
+
+
+def record_dtype(np):
+    return np.dtype([("time", "<f8"), ("seed", "<u8"), ("rotation", "<f8"), ("wheel", "<u8"),
+                     ("winner", "<u8"), ("index", "<u4"), ("source", "<u4")])
+
+
+class SpinHistory:
+    """Spin history log with a background writer"""
+    def __init__(self, directory=HISTORY_DIR, max_file_bytes=16 * 1024 * 1024,
+                 fsync_interval=1.0, max_batch=4096):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.thread = None
+        self.start_lock = threading.Lock()
+        self.names = {}
+        self.names_lock = threading.Lock()
+        self.names_loaded = False
+        self.file = None
+
+    # ===========================
+    # Writing
+    # ===========================
+    def record(self, wheel, winner, winner_index, rotation, seed=None, source=SOURCE_SPIN,
+               timestamp=None, landing="continuous"):
+        """Queue one spin for writing, without blocking on the disk.
+
+        seed is the seed that replays the spin, or None when it cannot be
+        replayed; that is stored as seed 0 and reported as not replayable.
+        landing is the landing mode a free spin was made with.
+        """
+        if seed is not None and not is_spin_seed(seed):
+            raise ValueError(f"A recorded seed is between 1 and 2**64 - 1, not {seed!r}.")
+        if landing not in LANDING_CODES:
+            raise ValueError(f"Unknown landing mode '{landing}'.")
+        if source == SOURCE_SPIN:
+            source |= LANDING_CODES[landing] << LANDING_SHIFT
+        if self.thread is None:
+            self.start()
+        wheel_key = name_key(wheel)
+        winner_key = name_key(winner)
+        data = RECORD.pack(time.time() if timestamp is None else timestamp, seed or 0,
+                           rotation, wheel_key, winner_key, winner_index, source)
+        self.queue.put(("record", ((wheel_key, wheel), (winner_key, winner)), data))
+
+    def flush(self, sync=False):
+        """Wait until every queued record has been written, and fsynced if sync"""
+        if self.thread is None:
+            return
+        done = threading.Event()
+        self.queue.put(("flush", sync, done))
+        done.wait()
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self.load_names()
+            self.thread = threading.Thread(target=self.run, name="spin-history", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def close(self):
+        """Write and fsync everything queued, then stop the writer"""
+        if self.thread is None:
+            return
+        self.queue.put(("stop",))
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = []
+            waiters = []
+            sync = stop = False
+            for message in batch:
+                if message[0] == "record":
+                    self.remember_names(message[1])
+                    records.append(message[2])
+                elif message[0] == "flush":
+                    sync = sync or message[1]
+                    waiters.append(message[2])
+                else:
+                    stop = sync = True
+
+            try:
+                if records:
+                    self.append(records)
+                    dirty = True
+                if dirty and (sync or time.monotonic() - last_sync >= self.fsync_interval):
+                    os.fsync(self.file.fileno())
+                    last_sync = time.monotonic()
+                    dirty = False
+            except OSError as e:
+                print(f"Could not write spin history: {e}")
+
+            for done in waiters:
+                done.set()
+            if stop:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                return
+
+    def append(self, records):
+        """Write records to the current file, rotating by size"""
+        i = 0
+        while i < len(records):
+            if self.file is None:
+                self.open_file()
+            room = (self.max_file_bytes - self.file.tell()) // RECORD.size
+            if room < 1 and self.file.tell() > HEADER.size:
+                self.open_file()
+                continue
+            # A new file takes at least one record, however small max_file_bytes is
+            count = min(max(room, 1), self.max_batch, len(records) - i)
+            self.file.write(b"".join(records[i:i + count]))
+            i += count
+        self.file.flush()
+
+    def open_file(self):
+        """Continue the newest file if it has room, else start the next one"""
+        paths = self.files()
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+        elif paths and os.path.getsize(paths[-1]) < HEADER.size:
+            # Created just before a crash, before its header was complete: start it again
+            self.file = open(paths[-1], "wb")
+            self.file.write(HEADER.pack(MAGIC, RECORD.size, 0))
+            return
+        elif paths and os.path.getsize(paths[-1]) < self.max_file_bytes and has_header(paths[-1]):
+            self.file = open(paths[-1], "ab")
+            self.file.seek(0, os.SEEK_END)
+            # Drop a record cut short by a crash so the rest stay aligned
+            extra = (self.file.tell() - HEADER.size) % RECORD.size
+            if extra:
+                self.file.truncate(self.file.tell() - extra)
+            return
+
+        number = int(os.path.basename(paths[-1])[6:12]) + 1 if paths else 1
+        self.file = open(os.path.join(self.directory, f"spins-{number:06d}.bin"), "wb")
+        self.file.write(HEADER.pack(MAGIC, RECORD.size, 0))
+    # ===========================
+    # Names
+    # ===========================
+    def load_names(self):
+        path = os.path.join(self.directory, NAMES_FILE)
+        names = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Cut short by a crash
+                    names[entry["key"]] = entry["name"]
+        with self.names_lock:
+            self.names.update(names)
+            self.names_loaded = True
+
+    def remember_names(self, pairs):
+        new = []
+        with self.names_lock:
+            for key, name in pairs:
+                if key not in self.names:
+                    self.names[key] = name
+                    new.append({"key": key, "name": name})
+        if new:
+            with open(os.path.join(self.directory, NAMES_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in new))
+
+    def name(self, key):
+        if not self.names_loaded:
+            self.load_names()
+        return self.names.get(key, f"#{key:016x}")
+
+    # ===========================
+    # Queries
+    # ===========================
+    def files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                      if f.startswith("spins-") and f.endswith(".bin"))
+
+    def scan(self, wheel):
+        """Return the wheel's records, oldest first.
+
+        A NumPy structured array with the FIELDS columns when NumPy is
+        available, otherwise a list of tuples in FIELDS order.
+        """
+        self.flush()
+        key = name_key(wheel)
+        np = load_numpy()
+        parts = []
+        for path in self.files():
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size <= HEADER.size or not has_header(path):
+                    continue  # Empty, or not written in this record format
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    count = (len(mm) - HEADER.size) // RECORD.size
+                    if np is not None:
+                        records = np.frombuffer(mm, record_dtype(np), count, HEADER.size)
+                        parts.append(records[records["wheel"] == key])  # Copies the matches
+                        del records
+                    else:
+                        end = HEADER.size + count * RECORD.size
+                        with memoryview(mm)[HEADER.size:end] as view:
+                            parts.append([r for r in RECORD.iter_unpack(view) if r[3] == key])
+
+        if np is not None:
+            return np.concatenate(parts) if parts else np.empty(0, record_dtype(np))
+        return [r for part in parts for r in part]
+
+    def stats(self, wheel, last=20):
+        """Return win counts, streaks and the last results of a wheel"""
+        records = self.scan(wheel)
+        np = load_numpy()
+        if np is not None:
+            winners = records["winner"]
+            keys, counts = np.unique(winners, return_counts=True)
+            wins = dict(zip(keys.tolist(), counts.tolist()))
+            runs = []
+            if len(winners):
+                starts = np.concatenate(([0], np.flatnonzero(winners[1:] != winners[:-1]) + 1))
+                lengths = np.diff(np.concatenate((starts, [len(winners)])))
+                longest = int(lengths.argmax())
+                runs = [(int(winners[starts[longest]]), int(lengths[longest])),
+                        (int(winners[-1]), int(lengths[-1]))]
+            recent = records[-last:][::-1].tolist() if last else []
+        else:
+            wins = {}
+            runs = []
+            streak_key, streak = None, 0
+            best = (None, 0)
+            for record in records:
+                winner = record[4]
+                wins[winner] = wins.get(winner, 0) + 1
+                streak = streak + 1 if winner == streak_key else 1
+                streak_key = winner
+                if streak > best[1]:
+                    best = (winner, streak)
+            if records:
+                runs = [best, (streak_key, streak)]
+            recent = records[-last:][::-1] if last else []
+
+        total = len(records)
+        return {
+            "wheel": wheel,
+            "spins": total,
+            "wins": sorted(((self.name(key), count) for key, count in wins.items()),
+                           key=lambda pair: -pair[1]),
+            "longest_streak": (self.name(runs[0][0]), runs[0][1]) if runs else None,
+            "current_streak": (self.name(runs[1][0]), runs[1][1]) if runs else None,
+            "last": [self.describe(r) for r in recent],
+        }
+
+    def describe(self, record):
+        """Return one record as a dict, with its source and landing mode by name"""
+        source = record[6] & ((1 << LANDING_SHIFT) - 1)
+        landing = record[6] >> LANDING_SHIFT
+        replayable = bool(record[1]) and source in REPLAYABLE_SOURCES and landing in LANDING_NAMES
+        return {"time": record[0], "seed": record[1] or None, "rotation": record[2],
+                "item": self.name(record[4]), "index": record[5],
+                "source": SOURCE_NAMES.get(source, str(source)),
+                "landing": LANDING_NAMES.get(landing, str(landing)) if source == SOURCE_SPIN else None,
+                "replayable": replayable}
+
+
+HISTORY = SpinHistory()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show a wheel's spin history")
+    parser.add_argument("wheel")
+    parser.add_argument("--last", type=int, default=20, help="How many recent results to show")
+    args = parser.parse_args()
+
+    stats = HISTORY.stats(args.wheel, args.last)
+    print(json.dumps(stats, indent=2))
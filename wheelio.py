@@ -0,0 +1,299 @@
+"""Streaming import and export of wheel items.
+
+Supported formats:
+    text   one item per line, "name" or "name:size" (the WheelDialog format)
+    csv    name[,size] rows, with an optional name,size header
+    jsonl  one JSON value per line: "name", ["name", size] or
+           {"name": ..., "size": ...}
+
+Files are read line by line, duplicate names are merged by summing their
+sizes and every invalid line is reported at the end instead of stopping at
+the first one.
+"""
+import csv
+import io
+import json
+import math
+import os
+
+from wheelengine import is_spin_seed
+from wheelstore import atomic_write, get_store
+
+FORMATS = ("text", "csv", "jsonl")
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".txt": "text"}
+
+
+class LineError(ValueError):
+    """An input line that could not be parsed"""
+
+
+class ImportResult:
+    """Outcome of importing one file"""
+    def __init__(self, name, items, errors, lines, cancelled=False):
+        self.name = name
+        self.items = items
+        self.errors = errors  # [(line_number, message), ...]
+        self.lines = lines
+        self.cancelled = cancelled
+
+    def error_report(self, limit=20):
+        """Return the invalid lines as text, at most limit of them"""
+        lines = [f"Line {number}: {message}" for number, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"... and {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+
+def detect_format(path):
+    """Guess the format of a file from its extension"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def parse_size(value, item):
+    """Parse a positive size, keeping whole numbers as ints and others as floats"""
+    text = str(value).strip()
+    try:
+        size = int(text)
+    except ValueError:
+        try:
+            size = float(text)
+        except ValueError:
+            size = 0
+    if not 0 < size < math.inf:
+        raise LineError(f"Invalid size for '{item}'. Size must be a positive number.")
+    if isinstance(size, float) and size.is_integer():
+        size = int(size)
+    return size
+
+
+def parse_text_line(line):
+    """Parse a "name" or "name:size" line into (item, size)"""
+    if ":" in line:
+        item, size = line.split(":", 1)
+        item = item.strip()
+        if not item:
+            raise LineError("Missing item name.")
+        return item, parse_size(size, item)
+    return line, 1
+
+
+def parse_csv_row(row):
+    """Parse a name[,size] CSV row into (item, size)"""
+    item = row[0].strip()
+    if not item:
+        raise LineError("Missing item name.")
+    if len(row) < 2 or not row[1].strip():
+        return item, 1
+    return item, parse_size(row[1], item)
+
+
+def parse_json_value(value):
+    """Parse a decoded JSON line into (item, size)"""
+    if isinstance(value, str):
+        item, size = value, 1
+    elif isinstance(value, list) and len(value) in (1, 2):
+        item, size = value[0], value[1] if len(value) == 2 else 1
+    elif isinstance(value, dict):
+        item = value.get("name", value.get("item"))
+        size = value.get("size", 1)
+    else:
+        raise LineError("Expected a string, [name, size] or {\"name\": ..., \"size\": ...}.")
+    if not isinstance(item, str) or not item.strip():
+        raise LineError("Missing item name.")
+    if isinstance(size, bool) or not isinstance(size, (int, float)):
+        raise LineError(f"Invalid size for '{item}'. Size must be a positive number.")
+    return item.strip(), parse_size(size, item)
+
+
+def read_items(f, fmt):
+    """Yield (line_number, item, size, error) for each non-empty line of f.
+
+    Exactly one of (item, size) and error is set.
+    """
+    if fmt == "csv":
+        reader = csv.reader(f)
+        number = 0
+        while True:
+            number += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:  # e.g. a field over csv.field_size_limit(); the reader goes on
+                yield number, None, None, str(e)
+                continue
+            if not row or not "".join(row).strip():
+                continue
+            # Skip a name,size header
+            if number == 1 and row[0].strip().lower() in ("name", "item"):
+                continue
+            try:
+                item, size = parse_csv_row(row)
+            except LineError as e:
+                yield number, None, None, str(e)
+                continue
+            yield number, item, size, None
+
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if fmt == "jsonl":
+                try:
+                    value = json.loads(line)
+                except ValueError:
+                    raise LineError("Not valid JSON.")
+                item, size = parse_json_value(value)
+            else:
+                item, size = parse_text_line(line)
+        except LineError as e:
+            yield number, None, None, str(e)
+            continue
+        yield number, item, size, None
+
+
+def import_wheel(path, name, fmt=None, save=None, progress=None, cancel=None,
+                 progress_every=10000):
+    """Stream a file into a wheel and save it.
+
+    Duplicate names are merged by summing their sizes. progress is called
+    as progress(lines, bytes_read, total_bytes) every progress_every lines,
+    and the import stops without saving once cancel (a threading.Event) is
+    set. Nothing is saved if fewer than 2 distinct items were read.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}.")
+    save = save or get_store().save_wheel
+    total_bytes = os.path.getsize(path)
+
+    sizes = {}
+    errors = []
+    lines = 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for number, item, size, error in read_items(f, fmt):
+            lines = number
+            if error is not None:
+                errors.append((number, error))
+            else:
+                sizes[item] = sizes.get(item, 0) + size
+
+            if number % progress_every == 0:
+                if cancel is not None and cancel.is_set():
+                    return ImportResult(name, [], errors, lines, cancelled=True)
+                if progress is not None:
+                    progress(lines, f.buffer.tell(), total_bytes)
+
+    items = list(sizes.items())
+    if progress is not None:
+        progress(lines, total_bytes, total_bytes)
+    if len(items) < 2:
+        errors.append((lines, "Need at least 2 items."))
+        return ImportResult(name, [], errors, lines)
+
+    save(name, items)
+    return ImportResult(name, items, errors, lines)
+
+
+def check_round_trip(items_with_sizes):
+    """Write items in every format, read them back and return a list of differences"""
+    problems = []
+    for fmt in FORMATS:
+        f = io.StringIO(newline="")
+        write_items(items_with_sizes, f, fmt)
+        f.seek(0)
+        read = []
+        for number, item, size, error in read_items(f, fmt):
+            if error is not None:
+                problems.append(f"{fmt} line {number}: {error}")
+            else:
+                read.append((item, size))
+        if read != [(item, size) for item, size in items_with_sizes]:
+            problems.append(f"{fmt}: read back {read}")
+    return problems
+
+
+def write_items(items_with_sizes, f, fmt):
+    """Write wheel items to an open file in the given format"""
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(["name", "size"])
+        for item, size in items_with_sizes:
+            writer.writerow([item, size])
+    elif fmt == "jsonl":
+        for item, size in items_with_sizes:
+            f.write(json.dumps({"name": item, "size": size}) + "\n")
+    elif fmt == "text":
+        for item, size in items_with_sizes:
+            f.write(f"{item}\n" if size == 1 else f"{item}:{size}\n")
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}.")
+
+
+def export_wheel(items_with_sizes, path, fmt=None):
+    """Write wheel items to path, guessing the format from its extension"""
+    fmt = fmt or detect_format(path)
+    with atomic_write(path, newline="") as f:
+        write_items(items_with_sizes, f, fmt)
+
+
+def write_plan(path, entries):
+    """Write precomputed spins, one JSON object per line (see SpinOutcome.to_dict)"""
+    with atomic_write(path) as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def read_plan(path):
+    """Read precomputed spins written by write_plan(); every entry has at least a seed"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}") from None
+            if not isinstance(entry, dict) or not is_spin_seed(entry.get("seed")):
+                raise ValueError(f"line {number}: expected an object with a seed from 1 to 2**64 - 1")
+            entries.append(entry)
+    return entries
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Import or export wheel items")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Create a wheel from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("name")
+    import_parser.add_argument("--format", choices=FORMATS)
+    export_parser = commands.add_parser("export", help="Write a wheel's items to a file")
+    export_parser.add_argument("name")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+    commands.add_parser("check", help="Check that every format reads back what it writes")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        problems = check_round_trip([("a", 1), ("b c", 1.5), ("d,e", 0.25), ("f", 2)])
+        print("\n".join(problems) or "All formats round-trip.")
+        sys.exit(1 if problems else 0)
+
+    if args.command == "import":
+        result = import_wheel(args.path, args.name, args.format)
+        if result.errors:
+            print(result.error_report(limit=len(result.errors)), file=sys.stderr)
+        if not result.items:
+            sys.exit(1)
+        print(f"Imported {len(result.items)} items into '{args.name}'.")
+    else:
+        items = get_store().load_wheel(args.name)
+        if items is None:
+            sys.exit(f"No wheel named '{args.name}'.")
+        export_wheel(items, args.path, args.format)
+        print(f"Exported {len(items)} items to {args.path}.")
@@ -0,0 +1,210 @@
+"""Opt-in instrumentation for Spin the Wheel.
+
+METRICS collects counters, gauges and histograms once enabled. Every
+recording call returns immediately while it is disabled, so instrumented
+code costs one attribute check. Metrics can be read in process with
+snapshot() or prometheus_text(), or written periodically to a file in the
+Prometheus text format (or JSON for a .json path).
+"""
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+# Upper bounds in seconds, from sub-millisecond frames to multi-second spins
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Bucketed distribution of observed values"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return [(upper_bound, cumulative_count), ...] ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms"""
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.writer = None
+        self.writer_stop = threading.Event()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to value"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def remove_gauge(self, name, **labels):
+        """Drop a gauge, e.g. when the thing it measures goes away"""
+        with self.lock:
+            self.gauges.pop((name, label_key(labels)), None)
+
+    def observe(self, name, value, **labels):
+        """Record value in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def timed(self, name, **labels):
+        """Decorator recording each call's duration in a histogram"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return every metric as plain data"""
+        with self.lock:
+            return {
+                "timestamp": time.time(),
+                "counters": [{"name": name, "labels": dict(key), "value": value}
+                             for (name, key), value in sorted(self.counters.items())],
+                "gauges": [{"name": name, "labels": dict(key), "value": value}
+                           for (name, key), value in sorted(self.gauges.items())],
+                "histograms": [{"name": name, "labels": dict(key), "count": h.count, "sum": h.sum,
+                                "buckets": [[bound, count] for bound, count in h.cumulative()[:-1]]}
+                               for (name, key), h in sorted(self.histograms.items())],
+            }
+
+    def prometheus_text(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            declared = set()
+
+            def declare(name, kind):
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+
+            for (name, key), value in sorted(self.counters.items()):
+                declare(name, "counter")
+                lines.append(f"{name}{format_labels(key)} {value}")
+            for (name, key), value in sorted(self.gauges.items()):
+                declare(name, "gauge")
+                lines.append(f"{name}{format_labels(key)} {value}")
+            for (name, key), h in sorted(self.histograms.items()):
+                declare(name, "histogram")
+                for bound, count in h.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{format_labels(key, [('le', le)])} {count}")
+                lines.append(f"{name}_sum{format_labels(key)} {h.sum}")
+                lines.append(f"{name}_count{format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path atomically, as JSON for .json paths"""
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.prometheus_text()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def start_writer(self, path, interval=10.0):
+        """Enable metrics and write them to path every interval seconds"""
+        self.enable()
+        if self.writer is not None:
+            return
+        self.writer_stop.clear()
+
+        def run():
+            while not self.writer_stop.wait(interval):
+                try:
+                    self.write(path)
+                except OSError as e:
+                    print(f"Could not write metrics to {path}: {e}")
+            self.write(path)
+
+        self.writer = threading.Thread(target=run, name="metrics-writer", daemon=True)
+        self.writer.start()
+
+    def stop_writer(self):
+        """Stop the periodic writer after one last write"""
+        if self.writer is not None:
+            self.writer_stop.set()
+            self.writer.join()
+            self.writer = None
+
+
+METRICS = Metrics()
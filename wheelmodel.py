@@ -0,0 +1,93 @@
+"""Compact, shared wheel data.
+
+A wheel's items travel as [(item, size), ...] lists, which costs a tuple
+(or, after a JSON round trip, a list) and an int object per item. Wheel
+keeps the same data as one list of labels and flat arrays of sizes and
+running totals. It is treated as immutable, so the cache, the engine and
+every open window can share one instance; a window streaming live sizes
+changes its own copy() with set_sizes().
+"""
+from array import array
+from itertools import accumulate, chain
+
+# Sector colors, shared by the Tk canvas and the off-screen renderers
+WHEEL_COLORS = ["#e74c3c", "#3498db", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c",
+                "#d35400", "#c0392b", "#16a085", "#8e44ad", "#2c3e50", "#f1c40f"]
+
+
+class Wheel:
+    """Immutable wheel data that behaves like a sequence of (item, size) pairs"""
+    __slots__ = ("labels", "sizes", "cumulative", "total")
+
+    def __init__(self, items_with_sizes):
+        labels = []
+        sizes = []
+        for item, size in items_with_sizes:
+            labels.append(item)
+            sizes.append(size)
+
+        # Whole-number sizes fit in 64-bit ints, anything else is kept as doubles
+        typecode = "q" if all(type(size) is int for size in sizes) else "d"
+        self.labels = labels
+        self.sizes = array(typecode, sizes)
+        self.cumulative = array(typecode, accumulate(sizes))
+        self.total = self.cumulative[-1] if sizes else 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        return self.labels[index], self.sizes[index]
+
+    def __iter__(self):
+        return zip(self.labels, self.sizes)
+
+    def __reduce__(self):
+        return Wheel, (self.to_list(),)
+
+    def __repr__(self):
+        return f"Wheel({len(self)} items, total={self.total})"
+
+    @property
+    def angle_per_unit(self):
+        """Degrees of the wheel covered by one unit of size"""
+        return 360 / self.total
+
+    def copy(self):
+        """Return a private copy whose sizes can be changed with set_sizes()"""
+        wheel = Wheel.__new__(Wheel)
+        wheel.labels = list(self.labels)
+        wheel.sizes = array(self.sizes.typecode, self.sizes)
+        wheel.cumulative = array(self.cumulative.typecode, self.cumulative)
+        wheel.total = self.total
+        return wheel
+
+    def set_sizes(self, changes):
+        """Change sizes in place from {index: size} and return the first changed index.
+
+        Only for a copy() nobody else holds. Running totals are recomputed
+        from the first changed item on, rather than adjusted by the
+        difference, so repeated fractional updates don't drift.
+        """
+        if self.sizes.typecode == "q" and any(type(size) is not int for size in changes.values()):
+            self.sizes = array("d", self.sizes)
+            self.cumulative = array("d", self.cumulative)
+        for index, size in changes.items():
+            self.sizes[index] = size
+        first = min(changes)
+        before = self.cumulative[first - 1] if first else 0
+        self.cumulative[first:] = array(self.cumulative.typecode,
+                                        accumulate(chain((before,), self.sizes[first:])))[1:]
+        self.total = self.cumulative[-1]
+        return first
+
+    def to_list(self):
+        """Return the items as a plain [[item, size], ...] list, e.g. for JSON"""
+        return [[item, size] for item, size in zip(self.labels, self.sizes)]
+
+
+def as_wheel(items_with_sizes):
+    """Return items_with_sizes as a Wheel, without copying one that already is"""
+    if isinstance(items_with_sizes, Wheel):
+        return items_with_sizes
+    return Wheel(items_with_sizes)
@@ -0,0 +1,237 @@
+"""Off-screen Pillow rendering for Spin the Wheel.
+
+The wheel is rasterized once with ImageDraw, and animation frames are made by
+rotating that bitmap. Rotated frames are quantized to a fixed angle step and
+kept in a bounded LRU cache shared by every window, so repeated spins of the
+same wheel cost almost nothing.
+
+Canvas-drawn wheels use the same idea for their labels: tk_label() renders
+each rotated label once and keeps it in LABEL_CACHE, so a frame only moves
+image items instead of having Tk lay out and rotate text.
+"""
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_NAMES = ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf"]
+LABEL_ANGLE_STEP = 3.0  # Degrees between the cached rotations of a label
+
+
+@lru_cache(maxsize=32)
+def load_font(size):
+    """Load a bold label font, falling back to Pillow's default font"""
+    for name in FONT_NAMES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def wheel_key(items_with_sizes, radius, colors=()):
+    """Return a stable hash identifying a wheel's items, colors and rendered size"""
+    data = json.dumps([[[str(item), size] for item, size in items_with_sizes], list(colors)])
+    return hashlib.sha1(f"{radius}:{data}".encode("utf-8")).hexdigest()
+
+
+class FrameCache:
+    """Bounded LRU of rendered frames, limited by their size in bytes"""
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def get(self, key, factory, nbytes):
+        """Return the cached frame for key, rendering it with factory on a miss.
+
+        nbytes can be a function of the new frame when its size isn't known up front.
+        """
+        with self.lock:
+            entry = self.frames.get(key)
+            if entry is not None:
+                self.frames.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        frame = factory()
+        if callable(nbytes):
+            nbytes = nbytes(frame)
+
+        with self.lock:
+            if key not in self.frames:
+                self.frames[key] = (frame, nbytes)
+                self.current_bytes += nbytes
+            self.evict()
+        return frame
+
+    def evict(self):
+        """Drop the least recently used frames until under the memory ceiling"""
+        while self.current_bytes > self.max_bytes and len(self.frames) > 1:
+            _, (_, nbytes) = self.frames.popitem(last=False)
+            self.current_bytes -= nbytes
+
+    def invalidate(self, wheel):
+        """Drop every frame rendered for the given wheel key"""
+        with self.lock:
+            for key in [key for key in self.frames if key[0] == wheel]:
+                _, nbytes = self.frames.pop(key)
+                self.current_bytes -= nbytes
+
+    def clear(self):
+        """Drop every cached frame"""
+        with self.lock:
+            self.frames.clear()
+            self.current_bytes = 0
+
+
+FRAME_CACHE = FrameCache()
+LABEL_CACHE = FrameCache(max_bytes=64 * 1024 * 1024)
+
+
+@lru_cache(maxsize=4096)
+def text_image(text, size, color):
+    """Render text in the label font on a transparent background, unrotated"""
+    font = load_font(size)
+    left, top, right, bottom = font.getbbox(text)
+    image = Image.new("RGBA", (right - left + 2, bottom - top + 2), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((1 - left, 1 - top), text, font=font, fill=color)
+    return image
+
+
+def label_image(text, size, color, angle, resample=Image.BICUBIC):
+    """Return text rotated by angle, its layout done only once per text, size and color"""
+    return text_image(text, size, color).rotate(angle, resample=resample, expand=True)
+
+
+def label_key(text, size, color, angle, step=LABEL_ANGLE_STEP):
+    """Return the LABEL_CACHE key of a label, with angle quantized to step"""
+    return ("label", text, size, color, round(angle / step) * step % 360)
+
+
+def tk_label(text, size, color, angle, step=LABEL_ANGLE_STEP, cache=None):
+    """Return a Tk PhotoImage of a rotated label, shared by every window.
+
+    size is in pixels and angle is quantized to step, so each label has at
+    most 360 / step images however many frames show it.
+    """
+    from PIL import ImageTk
+
+    key = label_key(text, size, color, angle, step)
+    cache = cache if cache is not None else LABEL_CACHE
+    return cache.get(
+        key,
+        # Small enough that bilinear looks the same as bicubic, at half the cost
+        lambda: ImageTk.PhotoImage(label_image(text, size, color, key[4], Image.BILINEAR)),
+        lambda photo: photo.width() * photo.height() * 4,
+    )
+
+
+class PillowWheelRenderer:
+    """Rasterizes a wheel once and serves rotated frames from a FrameCache"""
+    def __init__(self, items_with_sizes, colors, radius=200, step=1.0, supersample=3, cache=None):
+        self.items_with_sizes = items_with_sizes
+        self.colors = colors
+        self.radius = radius
+        self.step = step
+        self.steps = max(1, int(round(360 / step)))
+        self.supersample = supersample
+        self.cache = cache if cache is not None else FRAME_CACHE
+        self.key = wheel_key(items_with_sizes, radius, colors)
+        self.size = 2 * radius + 4
+        self.frame_bytes = self.size * self.size * 4
+        self.base = None
+
+    def rasterize(self):
+        """Draw the unrotated wheel at high quality"""
+        scale = self.supersample
+        size = self.size * scale
+        radius = self.radius * scale
+        center = size / 2
+        image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        bbox = [center - radius, center - radius, center + radius, center + radius]
+
+        total = sum(size for _, size in self.items_with_sizes)
+        angle_per_unit = 360 / total
+        font_size = 10 * scale
+
+        # Tk measures arcs counter-clockwise and Pillow clockwise, so flip the angles
+        start_angle = 0
+        for i, (item, item_size) in enumerate(self.items_with_sizes):
+            extent = item_size * angle_per_unit
+            color = self.colors[i % len(self.colors)]
+            draw.pieslice(bbox, -(start_angle + extent), -start_angle,
+                          fill=color, outline="white", width=2 * scale)
+
+            mid = start_angle + extent / 2
+            text_angle = mid
+            if text_angle > 90 and text_angle < 270:
+                text_angle += 180
+            x = center + radius * 0.75 * math.cos(math.radians(mid))
+            y = center - radius * 0.75 * math.sin(math.radians(mid))
+            self.paste_label(image, str(item), font_size, text_angle, x, y)
+
+            start_angle += extent
+
+        return image.resize((self.size, self.size), Image.LANCZOS)
+
+    def paste_label(self, image, text, font_size, angle, x, y):
+        """Draw text rotated by angle and centered on (x, y)"""
+        label = label_image(text, font_size, "white", angle)
+        image.alpha_composite(label, (int(x - label.width / 2), int(y - label.height / 2)))
+
+    def base_image(self):
+        """Return the unrotated wheel, rasterizing it on first use"""
+        if self.base is None:
+            self.base = self.rasterize()
+        return self.base
+
+    def angle_index(self, rotation):
+        """Quantize a rotation in degrees to a frame index"""
+        return int(round(rotation / self.step)) % self.steps
+
+    def render_frame(self, index):
+        """Rotate the base bitmap to the given frame index"""
+        # The base is already supersampled, so bilinear is enough here
+        return self.base_image().rotate(index * self.step, resample=Image.BILINEAR)
+
+    def frame(self, rotation):
+        """Return the wheel rotated by rotation degrees as a PIL image"""
+        index = self.angle_index(rotation)
+        return self.cache.get(
+            (self.key, self.step, index),
+            lambda: self.render_frame(index),
+            self.frame_bytes,
+        )
+
+    def tk_frame(self, rotation):
+        """Return the wheel rotated by rotation degrees as a Tk PhotoImage"""
+        from PIL import ImageTk
+
+        # Only the PhotoImage is cached, Tk keeps its own copy of the pixels
+        index = self.angle_index(rotation)
+        return self.cache.get(
+            (self.key, self.step, index, "tk"),
+            lambda: ImageTk.PhotoImage(self.render_frame(index)),
+            self.frame_bytes,
+        )
+
+    def invalidate(self):
+        """Drop every cached frame of this wheel"""
+        self.cache.invalidate(self.key)
+        self.base = None
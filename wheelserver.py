@@ -0,0 +1,501 @@
+"""Asyncio spin service for Spin the Wheel.
+
+Serves saved wheels over HTTP and WebSocket so other programs (stream
+overlays, chat bots) can spin them without anyone clicking SPIN:
+
+    python wheelserver.py --port 8765
+
+    GET  /wheels?prefix=&offset=&limit=    wheel names, as {"wheels": [...]}
+    GET  /wheels/NAME                      a wheel's items
+    POST /wheels/NAME/spin?count=N         spin N times, as {"spins": [...]}
+    GET  /ws                               WebSocket pushing every spin
+
+A spin is {"wheel", "index", "item", "rotation", "seed"}, where rotation is
+the final wheel rotation that puts the item under the pointer and seed
+replays the spin with WheelEngine.outcome(). WebSocket
+clients get every spin until they send {"subscribe": ["NAME", ...]}, and
+can send {"spin": "NAME", "count": N} to spin as well.
+
+Wheels are loaded through WHEEL_CACHE, so a spin request does no disk
+I/O. Every spin is decided by its own seed, like the GUI's spins, so any
+recorded spin can be replayed. Only the standard library is used.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from wheelengine import WheelEngine
+from wheelhistory import HISTORY, SOURCE_SERVICE
+from wheelmetrics import METRICS
+from wheelmodel import as_wheel
+from wheelstore import WHEEL_CACHE, get_store
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SPIN_CHUNK = 1000  # Spins decided between yields to the event loop
+MAX_SPINS_PER_REQUEST = 10000
+MAX_CONNECTIONS = 1024
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+HEADER_TIMEOUT = 10.0  # seconds to receive a request's headers
+REVALIDATE_SECONDS = 1.0  # How stale a loaded wheel may get before its signature is checked
+SUBSCRIBER_QUEUE = 1024  # Pushed messages buffered per WebSocket before it is dropped
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    """A request that gets an error response"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class WheelDraws:
+    """Seeded spins of one wheel"""
+    def __init__(self, name, items_with_sizes, seed=None):
+        self.name = name
+        self.items_with_sizes = as_wheel(items_with_sizes)
+        self.engine = WheelEngine(self.items_with_sizes, seed=seed)
+        self.checked = time.monotonic()
+
+    def spin(self, count):
+        """Return count spin results, each decided by its own seed"""
+        engine = self.engine
+        items = engine.items
+        seeds = engine.rng.getrandbits
+        results = []
+        for _ in range(count):
+            outcome = engine.outcome(seeds(64))
+            results.append({"wheel": self.name, "index": outcome.index, "item": items[outcome.index],
+                            "rotation": outcome.rotation, "seed": outcome.seed})
+        return results
+
+
+class Subscriber:
+    """A WebSocket client receiving pushed spins"""
+    def __init__(self):
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self.wheels = None  # None receives every wheel
+        self.dropped = False
+
+    def wants(self, wheel):
+        return self.wheels is None or wheel in self.wheels
+
+
+class SpinService:
+    """Spins saved wheels for HTTP and WebSocket clients.
+
+    Listeners added with add_listener() are called with each list of spins
+    on the event loop thread, e.g. to mirror them in the GUI. Spins are
+    recorded in history (a SpinHistory) when one is given.
+    """
+    def __init__(self, cache=WHEEL_CACHE, seed=None, history=None):
+        self.cache = cache
+        self.seed = seed
+        self.history = history
+        self.wheels = {}
+        self.subscribers = set()
+        self.listeners = []
+        self.connections = 0
+        self.writers = set()
+        self.server = None
+        self.loop = None
+        self.thread = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    # ===========================
+    # Wheels and spins
+    # ===========================
+    async def get_wheel(self, name):
+        """Return the WheelDraws of a saved wheel, reloading it if it changed"""
+        draws = self.wheels.get(name)
+        now = time.monotonic()
+        if draws is not None and now - draws.checked < REVALIDATE_SECONDS:
+            return draws
+
+        # The cache checks the store's signature, which touches the disk
+        loop = asyncio.get_running_loop()
+        items = await loop.run_in_executor(None, self.cache.get, name)
+        if items is None:
+            self.wheels.pop(name, None)
+            raise HttpError(404, f"No wheel named '{name}'.")
+        draws = self.wheels.get(name)
+        if draws is None or draws.items_with_sizes is not items:
+            # Each wheel gets its own stream, derived from the service seed
+            seed = None if self.seed is None else random.Random(f"{self.seed}:{name}").getrandbits(64)
+            draws = self.wheels[name] = WheelDraws(name, items, seed)
+        draws.checked = now
+        return draws
+
+    async def spin(self, name, count=1):
+        """Spin a wheel count times and push the results to subscribers"""
+        if not 1 <= count <= MAX_SPINS_PER_REQUEST:
+            raise HttpError(400, f"count must be between 1 and {MAX_SPINS_PER_REQUEST}.")
+        draws = await self.get_wheel(name)
+        spins = draws.spin(min(count, SPIN_CHUNK))
+        while len(spins) < count:
+            # A full request takes a while to decide, let other clients in between
+            await asyncio.sleep(0)
+            spins.extend(draws.spin(min(count - len(spins), SPIN_CHUNK)))
+        METRICS.inc("wheelserver_spins_total", count)
+        if self.history is not None:
+            for spin in spins:
+                self.history.record(name, spin["item"], spin["index"], spin["rotation"],
+                                    spin["seed"], SOURCE_SERVICE)
+        self.publish(name, spins)
+        return spins
+
+    def publish(self, name, spins):
+        if self.subscribers:
+            message = json.dumps({"spins": spins})
+            for subscriber in list(self.subscribers):
+                if subscriber.wants(name):
+                    try:
+                        subscriber.queue.put_nowait(message)
+                    except asyncio.QueueFull:
+                        # Never let one slow client hold up everyone else's spins
+                        subscriber.dropped = True
+                        self.subscribers.discard(subscriber)
+        for listener in list(self.listeners):
+            try:
+                listener(spins)
+            except Exception as e:
+                print(f"Spin listener failed: {e}")
+
+    async def list_wheels(self, prefix="", offset=0, limit=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, get_store().list_wheels, prefix, offset, limit)
+
+    # ===========================
+    # HTTP
+    # ===========================
+    async def handle_connection(self, reader, writer):
+        if self.connections >= MAX_CONNECTIONS:
+            await self.send(writer, 503, {"error": "Too many connections."}, keep_alive=False)
+            writer.close()
+            return
+        self.connections += 1
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), HEADER_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HttpError as e:
+                    await self.send(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, headers)
+                    break
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                start = time.perf_counter()
+                route, status = "unknown", 200
+                try:
+                    route, payload = await self.route(method, path, query, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    print(f"Spin service request failed: {e}")
+                    status, payload = 500, {"error": "Internal error."}
+                await self.send(writer, status, payload, keep_alive)
+                if METRICS.enabled:
+                    METRICS.inc("wheelserver_requests_total", route=route, status=status)
+                    METRICS.observe("wheelserver_request_seconds", time.perf_counter() - start,
+                                    route=route)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.writers.discard(writer)
+            writer.close()
+
+    async def read_request(self, reader):
+        """Read one request, or return None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise HttpError(413, "Request headers too large.")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(400, "Malformed request line.")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+            headers["connection"] = "close"
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), unquote(url.path), query, headers, body
+
+    async def route(self, method, path, query, body):
+        """Return (route name, payload) for a request"""
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] != ["wheels"] or len(parts) > 3:
+            raise HttpError(404, f"No route for {path}.")
+
+        if len(parts) == 1:
+            if method != "GET":
+                raise HttpError(405, "Use GET to list wheels.")
+            limit = query.get("limit")
+            names = await self.list_wheels(query.get("prefix", ""), int_param(query, "offset", 0, 0),
+                                           None if limit is None else int_param(query, "limit", 0, 0))
+            return "list", {"wheels": names}
+
+        name = parts[1]
+        if len(parts) == 2:
+            if method != "GET":
+                raise HttpError(405, "Use GET to read a wheel.")
+            draws = await self.get_wheel(name)
+            return "wheel", {"name": name, "items": draws.items_with_sizes.to_list()}
+
+        if parts[2] != "spin":
+            raise HttpError(404, f"No route for {path}.")
+        if method != "POST":
+            raise HttpError(405, "Use POST to spin a wheel.")
+        count = int_param(query, "count", 1)
+        if body:
+            try:
+                count = int(json.loads(body).get("count", count))
+            except (ValueError, TypeError, AttributeError):
+                raise HttpError(400, "Body must be JSON like {\"count\": 1}.")
+        return "spin", {"spins": await self.spin(name, count)}
+
+    async def send(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # ===========================
+    # WebSocket
+    # ===========================
+    async def handle_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self.send(writer, 400, {"error": "Missing Sec-WebSocket-Key."}, keep_alive=False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        METRICS.set_gauge("wheelserver_subscribers", len(self.subscribers))
+        pusher = asyncio.ensure_future(self.push(subscriber, writer))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:  # Close
+                    write_frame(writer, 0x8, payload[:2])
+                    break
+                if opcode == 0x9:  # Ping
+                    write_frame(writer, 0xA, payload)
+                elif opcode == 0x1:
+                    reply = await self.handle_message(subscriber, payload)
+                    if reply is not None:
+                        write_frame(writer, 0x1, json.dumps(reply).encode("utf-8"))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            METRICS.set_gauge("wheelserver_subscribers", len(self.subscribers))
+            pusher.cancel()
+
+    async def handle_message(self, subscriber, payload):
+        """Handle a client's JSON message and return a reply, if any"""
+        try:
+            message = json.loads(payload)
+            if "subscribe" in message:
+                wheels = message["subscribe"]
+                subscriber.wheels = None if wheels is None else set(wheels)
+                return {"subscribed": wheels}
+            if "spin" in message:
+                # Results arrive through the push like everyone else's
+                await self.spin(message["spin"], int(message.get("count", 1)))
+                return None
+        except HttpError as e:
+            return {"error": str(e)}
+        except (ValueError, TypeError, AttributeError):
+            pass
+        return {"error": "Expected {\"subscribe\": [...]} or {\"spin\": NAME}."}
+
+    async def push(self, subscriber, writer):
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                write_frame(writer, 0x1, message.encode("utf-8"))
+                await writer.drain()
+                if subscriber.dropped and subscriber.queue.empty():
+                    write_frame(writer, 0x8, struct.pack("!H", 1008) + b"Too slow")
+                    writer.close()
+                    return
+        except ConnectionError:
+            pass
+
+    # ===========================
+    # Running
+    # ===========================
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, host, port,
+                                                 limit=MAX_HEADER_BYTES, backlog=1024)
+        return self.server
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def start_in_thread(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Run the service on its own event loop thread, e.g. next to the Tk mainloop"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start(host, port))
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+
+        self.thread = threading.Thread(target=run, name="spin-service", daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            self.thread = None
+            raise errors[0]
+
+    def stop(self):
+        """Stop a service started with start_in_thread()"""
+        if self.thread is None:
+            return
+
+        async def shutdown():
+            self.server.close()
+            # Drop open keep-alive and WebSocket connections too, their handlers then return
+            for writer in list(self.writers):
+                writer.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if tasks:
+                await asyncio.wait(tasks, timeout=1.0)
+            self.loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+        self.thread.join()
+        self.thread = None
+
+
+def int_param(query, name, default, minimum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer.")
+    if minimum is not None and value < minimum:
+        raise HttpError(400, f"{name} must be at least {minimum}.")
+    return value
+
+
+async def read_frame(reader):
+    """Read one client WebSocket frame and return (opcode, payload)"""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY_BYTES:
+        raise ConnectionError("WebSocket frame too large.")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def write_frame(writer, opcode, payload):
+    """Write one unmasked, unfragmented server WebSocket frame"""
+    length = len(payload)
+    if length < 126:
+        head = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    writer.write(head + payload)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve wheel spins over HTTP and WebSocket")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="Address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", help="Seed the draws for reproducible spins")
+    parser.add_argument("--no-history", action="store_true", help="Don't record spins in the spin history")
+    args = parser.parse_args()
+
+    service = SpinService(seed=args.seed, history=None if args.no_history else HISTORY)
+    print(f"Serving spins on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    HISTORY.close()
@@ -0,0 +1,860 @@
+"""Storage backends for saved wheels.
+
+Both backends store the same [(item, size), ...] data, and accept a Wheel
+for it. JsonDirectoryStore is the original one-JSON-file-per-wheel layout,
+SQLiteStore keeps names, item counts, totals and modification times indexed
+so listing, prefix search and paging stay fast with tens of thousands of
+wheels.
+
+Files are replaced with atomic_write(), so a crash leaves either the old or
+the new wheel, and WHEEL_WRITER takes saves, renames and deletes off the
+caller's thread, writing bursts of them as one batch.
+"""
+import atexit
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from wheelmetrics import METRICS
+from wheelmodel import as_wheel
+
+WHEEL_DIR = "wheels"
+WHEEL_DB = "wheels.db"
+SUMMARY_FILE = ".summaries.jsonl"  # Item counts and totals of the JSON files, see JsonDirectoryStore
+
+# Sorts after every other character, used for prefix range queries
+PREFIX_END = "\U0010ffff"
+
+WRITE_DELAY = 0.05  # Seconds WHEEL_WRITER waits for more changes to batch with the first
+
+
+def sync_directory(directory):
+    """fsync a directory so renames in it survive a crash; a no-op where unsupported"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8", newline=None, sync=True, sync_dir=True):
+    """Write a file next to path that replaces path only once the block completes.
+
+    Readers and crashes see the old file or the whole new one, never a
+    partial write. With sync the data is fsynced before the rename and,
+    with sync_dir, the rename after it; callers replacing many files in one
+    directory can sync it once themselves.
+    """
+    directory = os.path.dirname(path)
+    # Hidden and not ending in .json, so directory listings skip it
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.urandom(4).hex()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if sync and sync_dir:
+        sync_directory(directory)
+
+
+def wheel_summary(name, items_with_sizes, modified):
+    """Return the indexed metadata of a wheel"""
+    return {
+        "name": name,
+        "item_count": len(items_with_sizes),
+        "total": sum(size for _, size in items_with_sizes),
+        "modified": modified,
+    }
+
+
+class JsonDirectoryStore:
+    """Stores each wheel as <directory>/<name>.json.
+
+    The sorted names are cached until the directory changes, so listing,
+    prefix search and paging are bisections. Item counts and totals are
+    kept in SUMMARY_FILE, keyed by each file's mtime and size, so
+    wheel_info() only parses a wheel that changed behind its back.
+    """
+    def __init__(self, directory=WHEEL_DIR):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.names = None
+        self.names_signature = None
+        self.summaries = None  # name -> (mtime_ns, size, item_count, total)
+        self.summary_lines = 0
+
+    def ensure_dir(self):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def sorted_names(self):
+        """Return every wheel name, sorted, rescanning only when the directory changed"""
+        self.ensure_dir()
+        signature = os.stat(self.directory).st_mtime_ns
+        with self.lock:
+            if self.names is None or signature != self.names_signature:
+                with os.scandir(self.directory) as entries:
+                    self.names = sorted(entry.name[:-len(".json")] for entry in entries
+                                        if entry.name.endswith(".json"))
+                self.names_signature = signature
+            return self.names
+
+    def prefix_range(self, prefix):
+        names = self.sorted_names()
+        if not prefix:
+            return names, 0, len(names)
+        return (names, bisect.bisect_left(names, prefix),
+                bisect.bisect_left(names, prefix + PREFIX_END))
+
+    def list_wheels(self, prefix="", offset=0, limit=None):
+        names, start, end = self.prefix_range(prefix)
+        start = min(start + offset, end)
+        return names[start:end if limit is None else min(end, start + limit)]
+
+    def count_wheels(self, prefix=""):
+        _, start, end = self.prefix_range(prefix)
+        return end - start
+
+    # ===========================
+    # Summaries
+    # ===========================
+    def load_summaries(self):
+        summaries = {}
+        lines = 0
+        try:
+            with open(os.path.join(self.directory, SUMMARY_FILE), encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        name, mtime_ns, size, item_count, total = json.loads(line)
+                    except ValueError:
+                        continue  # Cut short by a crash
+                    summaries[name] = (mtime_ns, size, item_count, total)
+        except FileNotFoundError:
+            pass
+        self.summaries = summaries
+        self.summary_lines = lines
+
+    def remember_summary(self, name, st, item_count, total):
+        """Record a wheel's summary, appending it to SUMMARY_FILE"""
+        self.remember_summaries([(name, st, item_count, total)])
+
+    def remember_summaries(self, summaries):
+        """Record (name, stat, item_count, total) summaries with one append to SUMMARY_FILE"""
+        with self.lock:
+            if self.summaries is None:
+                self.load_summaries()
+            lines = []
+            for name, st, item_count, total in summaries:
+                entry = (st.st_mtime_ns, st.st_size, item_count, total)
+                self.summaries[name] = entry
+                lines.append(json.dumps([name, *entry]) + "\n")
+            path = os.path.join(self.directory, SUMMARY_FILE)
+            if self.summary_lines + len(lines) > 2 * len(self.summaries) + 1000:
+                # Mostly superseded entries, write the live ones only. It is only an
+                # index, so it isn't fsynced, but a crash still can't truncate it
+                with atomic_write(path, sync=False) as f:
+                    f.writelines(json.dumps([key, *value]) + "\n" for key, value in self.summaries.items())
+                self.summary_lines = len(self.summaries)
+            else:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                self.summary_lines += len(lines)
+
+    def wheel_info(self, name):
+        try:
+            st = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            if self.summaries is None:
+                self.load_summaries()
+            entry = self.summaries.get(name)
+        if entry is None or entry[:2] != (st.st_mtime_ns, st.st_size):
+            # New to the index or changed by something else, read it once
+            items = self.load_wheel(name)
+            if items is None:
+                return None
+            summary = wheel_summary(name, items, st.st_mtime)
+            self.remember_summary(name, st, summary["item_count"], summary["total"])
+            return summary
+        return {"name": name, "item_count": entry[2], "total": entry[3], "modified": st.st_mtime}
+
+    def list_wheel_info(self, prefix="", offset=0, limit=None):
+        infos = (self.wheel_info(name) for name in self.list_wheels(prefix, offset, limit))
+        return [info for info in infos if info is not None]
+
+    def save_wheel(self, name, items_with_sizes):
+        self.save_many([(name, items_with_sizes)])
+
+    def save_many(self, wheels):
+        """Replace each wheel's file atomically, syncing the directory once for all of them"""
+        self.ensure_dir()
+        summaries = []
+        for name, items_with_sizes in wheels:
+            summary = self.write_file(name, items_with_sizes)
+            summaries.append((name, os.stat(self.path(name)), summary["item_count"], summary["total"]))
+        if not summaries:
+            return
+        sync_directory(self.directory)
+        self.remember_summaries(summaries)
+        for name, *_ in summaries:
+            self.update_names(name, True)
+
+    def write_file(self, name, items_with_sizes, path=None):
+        """Write a wheel to path (its own by default) and return its summary"""
+        with atomic_write(path or self.path(name), sync_dir=False) as f:
+            json.dump(list(items_with_sizes), f)
+        return wheel_summary(name, items_with_sizes, 0)
+
+    def rename_wheel(self, old, new, items_with_sizes=None):
+        """Move wheel old to the name new, with new items if given.
+
+        Returns False if old doesn't exist and there are no items. The items
+        first replace old's file, which is then renamed over new's, so after
+        a crash the wheel is found under one name or the other.
+        """
+        if old == new:
+            if items_with_sizes is None:
+                return self.signature(old) is not None
+            self.save_wheel(new, items_with_sizes)
+            return True
+        self.ensure_dir()
+        summary = None
+        if items_with_sizes is not None:
+            summary = self.write_file(old, items_with_sizes)
+        try:
+            os.replace(self.path(old), self.path(new))
+        except FileNotFoundError:
+            return False
+        sync_directory(self.directory)
+        st = os.stat(self.path(new))
+        with self.lock:
+            if summary is None and self.summaries is not None and old in self.summaries:
+                # A rename keeps the mtime and size the summary is keyed by
+                _, _, item_count, total = self.summaries[old]
+                summary = {"item_count": item_count, "total": total}
+            if summary is not None:
+                self.remember_summary(new, st, summary["item_count"], summary["total"])
+            self.update_names(old, False)
+            self.update_names(new, True)
+        return True
+
+    def update_names(self, name, present):
+        """Keep the cached names in step with a change made here, without rescanning"""
+        with self.lock:
+            if self.names is None:
+                return
+            i = bisect.bisect_left(self.names, name)
+            exists = i < len(self.names) and self.names[i] == name
+            if present and not exists:
+                self.names.insert(i, name)
+            elif not present and exists:
+                del self.names[i]
+            self.names_signature = os.stat(self.directory).st_mtime_ns
+
+    def signature(self, name):
+        """Return a cheap change marker for a wheel, or None if it doesn't exist"""
+        try:
+            st = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load_wheel(self, name):
+        path = self.path(name)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+        return None
+
+    def delete_wheel(self, name):
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(path)
+            self.update_names(name, False)
+            return True
+        return False
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """Stores wheels in a single SQLite database with an indexed summary"""
+    def __init__(self, path=WHEEL_DB):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS wheels (
+                name TEXT PRIMARY KEY,
+                items TEXT NOT NULL,
+                item_count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                modified REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS wheels_modified ON wheels (modified)")
+        self.db.commit()
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def prefix_clause(self, prefix):
+        # A range on the primary key uses the index, unlike LIKE 'prefix%'
+        if not prefix:
+            return "", ()
+        return "WHERE name >= ? AND name < ?", (prefix, prefix + PREFIX_END)
+
+    def list_wheels(self, prefix="", offset=0, limit=None):
+        where, params = self.prefix_clause(prefix)
+        rows = self.query(f"SELECT name FROM wheels {where} ORDER BY name LIMIT ? OFFSET ?",
+                          params + (-1 if limit is None else limit, offset))
+        return [row[0] for row in rows]
+
+    def count_wheels(self, prefix=""):
+        where, params = self.prefix_clause(prefix)
+        return self.query(f"SELECT COUNT(*) FROM wheels {where}", params)[0][0]
+
+    def wheel_info(self, name):
+        rows = self.query("SELECT name, item_count, total, modified FROM wheels WHERE name = ?",
+                          (name,))
+        if not rows:
+            return None
+        name, item_count, total, modified = rows[0]
+        return {"name": name, "item_count": item_count, "total": total, "modified": modified}
+
+    def list_wheel_info(self, prefix="", offset=0, limit=None):
+        where, params = self.prefix_clause(prefix)
+        rows = self.query(
+            f"SELECT name, item_count, total, modified FROM wheels {where} "
+            "ORDER BY name LIMIT ? OFFSET ?",
+            params + (-1 if limit is None else limit, offset))
+        return [{"name": name, "item_count": item_count, "total": total, "modified": modified}
+                for name, item_count, total, modified in rows]
+
+    def row(self, name, items_with_sizes, modified):
+        summary = wheel_summary(name, items_with_sizes, modified)
+        return (name, json.dumps(list(items_with_sizes)), summary["item_count"],
+                summary["total"], modified)
+
+    def save_wheel(self, name, items_with_sizes):
+        self.save_many([(name, items_with_sizes)])
+
+    def save_many(self, wheels):
+        now = time.time()
+        rows = [self.row(name, items, now) for name, items in wheels]
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO wheels VALUES (?, ?, ?, ?, ?)", rows)
+
+    def signature(self, name):
+        """Return a cheap change marker for a wheel, or None if it doesn't exist"""
+        rows = self.query("SELECT modified FROM wheels WHERE name = ?", (name,))
+        return rows[0][0] if rows else None
+
+    def load_wheel(self, name):
+        rows = self.query("SELECT items FROM wheels WHERE name = ?", (name,))
+        if rows:
+            return json.loads(rows[0][0])
+        return None
+
+    def rename_wheel(self, old, new, items_with_sizes=None):
+        """Move wheel old to the name new, with new items if given, in one transaction"""
+        with self.lock, self.db:
+            if items_with_sizes is not None:
+                self.db.execute("DELETE FROM wheels WHERE name = ?", (old,))
+                self.db.execute("INSERT OR REPLACE INTO wheels VALUES (?, ?, ?, ?, ?)",
+                                self.row(new, items_with_sizes, time.time()))
+                return True
+            if old == new:
+                return bool(self.db.execute("SELECT 1 FROM wheels WHERE name = ?", (old,)).fetchall())
+            if not self.db.execute("SELECT 1 FROM wheels WHERE name = ?", (old,)).fetchall():
+                return False
+            self.db.execute("DELETE FROM wheels WHERE name = ?", (new,))
+            # A new modified time, so caches holding the name new see the change
+            self.db.execute("UPDATE wheels SET name = ?, modified = ? WHERE name = ?",
+                            (new, time.time(), old))
+            return True
+
+    def delete_wheel(self, name):
+        with self.lock, self.db:
+            return self.db.execute("DELETE FROM wheels WHERE name = ?", (name,)).rowcount > 0
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def migrate_json_directory(directory, store, batch_size=1000):
+    """Import every <name>.json wheel in directory into store.
+
+    Returns (imported, failed) where failed lists the files that could not
+    be read.
+    """
+    imported = 0
+    failed = []
+    batch = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path, "r") as f:
+                batch.append((entry.name[:-len(".json")], json.load(f)))
+        except (OSError, ValueError):
+            failed.append(entry.name)
+            continue
+        if len(batch) >= batch_size:
+            store.save_many(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.save_many(batch)
+        imported += len(batch)
+    return imported, failed
+
+
+def same_items(a, b):
+    """Compare wheel data regardless of tuple/list pairs from a JSON round trip"""
+    if a is None or b is None:
+        return a is b
+    return len(a) == len(b) and all(list(x) == list(y) for x, y in zip(a, b))
+
+
+class WheelCache:
+    """Process-wide cache of wheel data keyed by name.
+
+    Entries are validated against the store's cheap signature (file mtime and
+    size, or the SQLite modified time) instead of being re-parsed, and kept
+    as Wheel objects shared by everything that loads the same wheel. Callbacks
+    subscribed to a wheel are called with (name, items) when its data changes,
+    or with items=None when it is deleted. A background thread can poll the
+    subscribed wheels for changes made outside this process.
+    """
+    def __init__(self, store=None, max_entries=64):
+        self.store = store
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # name -> (signature, items)
+        self.subscribers = {}
+        self.lock = threading.RLock()
+        self.poll_thread = None
+        self.poll_stop = threading.Event()
+        # Replaced by GUIs that need callbacks run on their own thread
+        self.dispatch = lambda callback, *args: callback(*args)
+        self.writer = None  # A WheelWriter whose queued changes get() returns
+
+    def get_store(self):
+        return self.store if self.store is not None else get_store()
+
+    def get(self, name):
+        """Return a wheel's items, loading them only if they changed"""
+        if self.writer is not None:
+            queued, items = self.writer.queued(name)
+            if queued:
+                return items
+        store = self.get_store()
+        signature = store.signature(name)
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(name)
+                return entry[1]
+
+        items = store.load_wheel(name) if signature is not None else None
+        return self.remember(name, signature, items)
+
+    def put(self, name, items):
+        """Record items just saved under name and notify subscribers"""
+        self.notify(name, self.remember(name, self.get_store().signature(name), items))
+
+    def discard(self, name):
+        """Forget a deleted wheel and notify subscribers"""
+        with self.lock:
+            self.entries.pop(name, None)
+        self.notify(name, None)
+
+    def remember(self, name, signature, items):
+        """Cache items under name and return them as a Wheel"""
+        if items is None:
+            with self.lock:
+                self.entries.pop(name, None)
+            return None
+
+        items = as_wheel(items)
+        with self.lock:
+            self.entries[name] = (signature, items)
+            self.entries.move_to_end(name)
+
+            # Subscribed wheels stay cached so polling has something to compare
+            for old in list(self.entries):
+                if len(self.entries) <= self.max_entries:
+                    break
+                if old not in self.subscribers:
+                    del self.entries[old]
+        return items
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def subscribe(self, name, callback):
+        with self.lock:
+            self.subscribers.setdefault(name, []).append(callback)
+
+    def unsubscribe(self, name, callback):
+        with self.lock:
+            callbacks = self.subscribers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(name, None)
+
+    def notify(self, name, items):
+        with self.lock:
+            callbacks = list(self.subscribers.get(name, []))
+        for callback in callbacks:
+            self.dispatch(callback, name, items)
+
+    def poll(self):
+        """Reload subscribed wheels whose signature changed and notify subscribers"""
+        store = self.get_store()
+        with self.lock:
+            names = list(self.subscribers)
+        for name in names:
+            if self.writer is not None and self.writer.queued(name)[0]:
+                continue  # Being written from here, and subscribers already know
+            signature = store.signature(name)
+            with self.lock:
+                entry = self.entries.get(name)
+            if entry is not None and entry[0] == signature:
+                continue
+
+            try:
+                items = store.load_wheel(name) if signature is not None else None
+            except ValueError:
+                continue  # Caught the file mid-write, try again next poll
+            items = self.remember(name, signature, items)
+            if entry is None or not same_items(entry[1], items):
+                self.notify(name, items)
+
+    def start_polling(self, interval=1.0):
+        """Poll for changes on a background thread every interval seconds"""
+        if self.poll_thread is not None:
+            return
+        self.poll_stop.clear()
+
+        def run():
+            while not self.poll_stop.wait(interval):
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Wheel cache poll failed: {e}")
+
+        self.poll_thread = threading.Thread(target=run, name="wheel-cache-poll", daemon=True)
+        self.poll_thread.start()
+
+    def stop_polling(self):
+        if self.poll_thread is not None:
+            self.poll_stop.set()
+            self.poll_thread.join()
+            self.poll_thread = None
+
+
+WHEEL_CACHE = WheelCache()
+
+
+class WheelWriter:
+    """Writes wheel saves, renames and deletes on a background thread.
+
+    save(), rename() and delete() queue the change and return a Future at
+    once, so a GUI thread never waits on the disk; threads that may wait
+    can call its result(), which raises the write's error. Until a change
+    is written, queued() serves it to readers, so the wheel cache's get()
+    sees it straight away, and subscribers are notified when it is queued.
+    The thread takes what arrives within WRITE_DELAY of the first change
+    as one batch, in order: consecutive saves go to the store with one
+    save_many(), keeping only the latest items of a wheel saved more than
+    once. flush() waits until everything queued is written.
+    """
+    def __init__(self, store=None, cache=None, delay=WRITE_DELAY, max_batch=4096):
+        self.store = store
+        self.cache = cache
+        self.delay = delay
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.thread = None
+        self.start_lock = threading.Lock()
+        self.pending = {}  # name -> [items, or None once deleted; queued changes not yet written]
+        self.unwritten = 0  # Every queued change, including renames that are not in pending
+        self.pending_lock = threading.Lock()
+
+    def save(self, name, items_with_sizes):
+        items_with_sizes = as_wheel(items_with_sizes)
+        future = Future()
+        self.track(name, items_with_sizes)
+        self.put(("save", name, items_with_sizes, future))
+        return future
+
+    def save_many(self, wheels):
+        return [self.save(name, items_with_sizes) for name, items_with_sizes in wheels]
+
+    def rename(self, old, new, items_with_sizes=None):
+        """Queue a rename of old to new, with new items if given, written as one atomic step.
+
+        Without items the rename is only visible to readers once written,
+        unless old's items are queued too.
+        """
+        if items_with_sizes is None:
+            queued, items = self.queued(old)
+            items_with_sizes = items if queued else None
+        names = ()
+        if items_with_sizes is not None:
+            items_with_sizes = as_wheel(items_with_sizes)
+            names = (old, new)
+            self.track(old, None)
+            self.track(new, items_with_sizes)
+        future = Future()
+        self.put(("rename", old, new, items_with_sizes, future, names))
+        return future
+
+    def delete(self, name):
+        future = Future()
+        self.track(name, None)
+        self.put(("delete", name, future))
+        return future
+
+    def track(self, name, items_with_sizes):
+        """Serve a queued change of name to readers and subscribers until it is written"""
+        with self.pending_lock:
+            entry = self.pending.setdefault(name, [None, 0])
+            entry[0] = items_with_sizes
+            entry[1] += 1
+        self.get_cache().notify(name, items_with_sizes)
+
+    def untrack(self, name):
+        with self.pending_lock:
+            entry = self.pending[name]
+            entry[1] -= 1
+            if not entry[1]:
+                del self.pending[name]
+
+    def queued(self, name):
+        """Return (True, items) for a wheel with unwritten changes, or (False, None).
+
+        items is None when the queued change deletes or renames the wheel.
+        """
+        with self.pending_lock:
+            entry = self.pending.get(name)
+        return (False, None) if entry is None else (True, entry[0])
+
+    def put(self, message):
+        """Queue a change, settled by settle() once written"""
+        if self.thread is None:
+            self.start()
+        with self.pending_lock:
+            self.unwritten += 1
+        self.queue.put(message)
+
+    def flush(self):
+        """Wait until every queued change has been written"""
+        if self.thread is None or not self.unwritten:
+            return
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        done.wait()
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="wheel-writer", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def close(self):
+        """Write everything queued, then stop the thread"""
+        if self.thread is None:
+            return
+        self.queue.put(("stop",))
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.delay
+            # Wait a moment for more changes, unless someone is waiting on this one
+            while batch[-1][0] not in ("flush", "stop") and len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            saves = {}  # name -> (items, futures of every save it replaces)
+            stop = False
+            for message in batch:
+                if message[0] == "save":
+                    _, name, items_with_sizes, future = message
+                    _, futures = saves.pop(name, (None, []))
+                    futures.append(future)
+                    saves[name] = (items_with_sizes, futures)
+                    continue
+                self.write_saves(saves)
+                saves = {}
+                if message[0] == "flush":
+                    message[1].set()
+                elif message[0] == "stop":
+                    stop = True
+                elif message[0] == "rename":
+                    self.write_rename(*message[1:])
+                else:
+                    self.write_delete(*message[1:])
+            self.write_saves(saves)
+            if stop:
+                return
+
+    def get_store(self):
+        return self.store if self.store is not None else get_store()
+
+    def get_cache(self):
+        return self.cache if self.cache is not None else WHEEL_CACHE
+
+    def write_saves(self, saves):
+        if not saves:
+            return
+        store = self.get_store()
+        started = time.perf_counter()
+        try:
+            store.save_many((name, items) for name, (items, _) in saves.items())
+            error = None
+            METRICS.observe("spinwheel_storage_seconds", time.perf_counter() - started, op="save")
+        except Exception as e:  # Keep the thread alive for the changes that follow
+            error = e
+            what = f"wheel '{next(iter(saves))}'" if len(saves) == 1 else f"{len(saves)} wheels"
+            print(f"Could not save {what}: {e}")
+        cache = self.get_cache()
+        for name, (items_with_sizes, futures) in saves.items():
+            if error is None:
+                cache.remember(name, store.signature(name), items_with_sizes)
+            for future in futures:
+                self.untrack(name)
+                self.settle(future, error)
+
+    def write_rename(self, old, new, items_with_sizes, future, names):
+        store = self.get_store()
+        cache = self.get_cache()
+        started = time.perf_counter()
+        try:
+            renamed = store.rename_wheel(old, new, items_with_sizes)
+            METRICS.observe("spinwheel_storage_seconds", time.perf_counter() - started, op="rename")
+            error = None
+        except Exception as e:
+            renamed = False
+            error = e
+            print(f"Could not rename wheel '{old}': {e}")
+        if renamed:
+            cache.remember(old, None, None)
+            if items_with_sizes is None:
+                # Not announced when it was queued
+                cache.discard(old)
+                cache.put(new, store.load_wheel(new))
+            else:
+                cache.remember(new, store.signature(new), items_with_sizes)
+        for name in names:
+            self.untrack(name)
+        self.settle(future, error, renamed)
+
+    def write_delete(self, name, future):
+        started = time.perf_counter()
+        try:
+            deleted = self.get_store().delete_wheel(name)
+            METRICS.observe("spinwheel_storage_seconds", time.perf_counter() - started, op="delete")
+            error = None
+        except Exception as e:
+            deleted = False
+            error = e
+            print(f"Could not delete wheel '{name}': {e}")
+        if deleted:
+            self.get_cache().remember(name, None, None)
+        self.untrack(name)
+        self.settle(future, error, deleted)
+
+    def settle(self, future, error, result=True):
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+        with self.pending_lock:
+            self.unwritten -= 1
+
+
+WHEEL_WRITER = WheelWriter()
+WHEEL_CACHE.writer = WHEEL_WRITER
+
+active_store = None
+
+
+def get_store():
+    """Return the store used by save_wheel/load_wheel/list_wheels/delete_wheel.
+
+    Uses the SQLite database when it exists and the JSON directory otherwise.
+    """
+    global active_store
+    if active_store is None:
+        if os.path.exists(WHEEL_DB):
+            active_store = SQLiteStore(WHEEL_DB)
+        else:
+            active_store = JsonDirectoryStore(WHEEL_DIR)
+    return active_store
+
+
+def set_store(store):
+    """Replace the active store"""
+    global active_store
+    WHEEL_WRITER.flush()  # Changes queued for the old store are written there
+    active_store = store
+    WHEEL_CACHE.clear()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import wheels/*.json into an SQLite store")
+    parser.add_argument("directory", nargs="?", default=WHEEL_DIR)
+    parser.add_argument("database", nargs="?", default=WHEEL_DB)
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.database)
+    imported, failed = migrate_json_directory(args.directory, store)
+    store.close()
+    print(f"Imported {imported} wheels into {args.database}.")
+    for name in failed:
+        print(f"Could not read {name}")